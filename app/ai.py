@@ -1,18 +1,48 @@
 import os
 import json
+import time
 import logging
-from openai import OpenAI
+import threading
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception
+from app import metrics
+from app.prompts import analysis_prompt, reply_prompt
 
 logger = logging.getLogger(__name__)
 
 AI_INTEGRATIONS_OPENAI_API_KEY = os.environ.get("AI_INTEGRATIONS_OPENAI_API_KEY")
 AI_INTEGRATIONS_OPENAI_BASE_URL = os.environ.get("AI_INTEGRATIONS_OPENAI_BASE_URL")
 
-client = OpenAI(
-    api_key=AI_INTEGRATIONS_OPENAI_API_KEY,
-    base_url=AI_INTEGRATIONS_OPENAI_BASE_URL,
-)
+# Suggested replies are generated on first request (POST /posts/{id}/reply)
+# except for these categories, which the daily job fills in up front so
+# the digest carries them.
+REPLY_PREFETCH_CATEGORIES = {
+    c.strip() for c in os.environ.get("REPLY_PREFETCH_CATEGORIES", "Funding,Launch").split(",") if c.strip()
+}
+
+# Returned when the model's answer is not valid JSON; such posts are not
+# real labels and are excluded from pre-classifier training.
+FALLBACK_SUMMARY = "Could not generate summary."
+
+# Retry-After sent with a 503 when an on-demand reply is rate limited.
+REPLY_RETRY_AFTER_SECONDS = int(os.environ.get("REPLY_RETRY_AFTER_SECONDS", "30"))
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    # The openai package is the single heaviest import in the app, so it is
+    # loaded with the client on the first analysis rather than at startup.
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from openai import OpenAI
+                _client = OpenAI(
+                    api_key=AI_INTEGRATIONS_OPENAI_API_KEY,
+                    base_url=AI_INTEGRATIONS_OPENAI_BASE_URL,
+                )
+    return _client
 
 
 def is_rate_limit_error(exception: BaseException) -> bool:
@@ -26,6 +56,23 @@ def is_rate_limit_error(exception: BaseException) -> bool:
     )
 
 
+def _record_usage(call: str, response, post, seconds: float):
+    # Falls back to the local count if the API omits usage.
+    usage = getattr(response, "usage", None)
+    prompt_tokens = getattr(usage, "prompt_tokens", None) or post.tokens
+    completion_tokens = getattr(usage, "completion_tokens", None) or 0
+    finish_reason = response.choices[0].finish_reason or "unknown"
+    metrics.ai_prompt_tokens.labels(call, str(post.trimmed).lower()).observe(prompt_tokens)
+    metrics.ai_completion_tokens.labels(call, finish_reason).observe(completion_tokens)
+    metrics.ai_request_seconds.labels(call, metrics.prompt_size_label(prompt_tokens)).observe(seconds)
+    logger.info(
+        f"OpenAI {call}: {prompt_tokens} prompt / {completion_tokens} completion tokens in {seconds:.2f}s "
+        f"(post {post.tokens} of {post.original_tokens} tokens, finish {finish_reason})"
+    )
+    if finish_reason == "length":
+        logger.warning(f"OpenAI {call} hit max_completion_tokens with a {prompt_tokens}-token prompt")
+
+
 @retry(
     stop=stop_after_attempt(5),
     wait=wait_exponential(multiplier=1, min=2, max=60),
@@ -35,19 +82,11 @@ def is_rate_limit_error(exception: BaseException) -> bool:
 def analyze_post(post_text: str, author_name: str) -> dict:
     # the newest OpenAI model is "gpt-5" which was released August 7, 2025.
     # do not change this unless explicitly requested by the user
-    prompt = f"""Analyze the following LinkedIn post by {author_name}.
-
-Post: {post_text}
-
-Respond in JSON with these fields:
-- "summary": A single-sentence summary of the post.
-- "category": Classify as one of: "Funding", "Hiring", "Launch", "Other".
-- "suggested_reply": A short, professional congratulatory reply (1-2 sentences).
-
-Return only valid JSON, no markdown."""
+    prompt, post = analysis_prompt(post_text, author_name)
 
     try:
-        response = client.chat.completions.create(
+        started = time.perf_counter()
+        response = get_client().chat.completions.create(
             model="gpt-5-mini",
             messages=[
                 {"role": "system", "content": "You are a LinkedIn relationship intelligence assistant. Always respond with valid JSON."},
@@ -56,6 +95,7 @@ Return only valid JSON, no markdown."""
             response_format={"type": "json_object"},
             max_completion_tokens=512,
         )
+        _record_usage("analysis", response, post, time.perf_counter() - started)
 
         content = response.choices[0].message.content or "{}"
         result = json.loads(content)
@@ -63,15 +103,57 @@ Return only valid JSON, no markdown."""
         return {
             "summary": result.get("summary", "No summary available."),
             "category": result.get("category", "Other"),
-            "suggested_reply": result.get("suggested_reply", "Congratulations on the update!"),
+            "suggested_reply": None,
         }
     except json.JSONDecodeError:
         logger.error(f"Failed to parse AI response as JSON for post by {author_name}")
         return {
-            "summary": "Could not generate summary.",
+            "summary": FALLBACK_SUMMARY,
             "category": "Other",
-            "suggested_reply": "Congratulations on the update!",
+            "suggested_reply": None,
         }
     except Exception as e:
         logger.error(f"OpenAI API error analyzing post by {author_name}: {e}")
         raise
+
+
+@retry(
+    stop=stop_after_attempt(5),
+    wait=wait_exponential(multiplier=1, min=2, max=60),
+    retry=retry_if_exception(is_rate_limit_error),
+    reraise=True,
+)
+def generate_reply(post_text: str, author_name: str, summary: str | None = None, category: str | None = None) -> str | None:
+    # None when the model's answer is unusable, so nothing is cached.
+    prompt, post = reply_prompt(post_text, author_name, summary, category)
+
+    try:
+        started = time.perf_counter()
+        response = get_client().chat.completions.create(
+            model="gpt-5-mini",
+            messages=[
+                {"role": "system", "content": "You are a LinkedIn relationship intelligence assistant. Always respond with valid JSON."},
+                {"role": "user", "content": prompt},
+            ],
+            response_format={"type": "json_object"},
+            max_completion_tokens=512,
+        )
+        _record_usage("reply", response, post, time.perf_counter() - started)
+
+        content = response.choices[0].message.content or "{}"
+        reply = json.loads(content).get("suggested_reply")
+        return reply.strip() if isinstance(reply, str) and reply.strip() else None
+    except json.JSONDecodeError:
+        logger.error(f"Failed to parse AI reply as JSON for post by {author_name}")
+        return None
+    except Exception as e:
+        logger.error(f"OpenAI API error generating reply for post by {author_name}: {e}")
+        raise
+
+
+# The long backoff above suits the daily job's prefetch. Someone waiting on
+# "Suggest a reply" gets one quick retry, then a 503 with Retry-After.
+generate_reply_now = generate_reply.retry_with(
+    stop=stop_after_attempt(2),
+    wait=wait_exponential(multiplier=1, min=1, max=3),
+)
@@ -0,0 +1,121 @@
+import logging
+from datetime import datetime, timedelta
+from sqlalchemy import select, func, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import database
+from app.models import PostDailyRollup, ProfileActivity, Profile
+
+logger = logging.getLogger(__name__)
+
+
+def record_post(db, profile: Profile, category: str | None, posted_at: datetime | None):
+    posted_at = posted_at or datetime.utcnow()
+    category = category or "Other"
+
+    rollup = insert(PostDailyRollup).values(
+        user_id=profile.user_id,
+        profile_id=profile.id,
+        day=posted_at.date(),
+        category=category,
+        post_count=1,
+    )
+    db.execute(rollup.on_conflict_do_update(
+        constraint="uq_post_daily_rollups_profile_day_category",
+        set_={"post_count": PostDailyRollup.post_count + 1},
+    ))
+
+    activity = insert(ProfileActivity).values(
+        profile_id=profile.id,
+        user_id=profile.user_id,
+        post_count=1,
+        first_post_at=posted_at,
+        last_post_at=posted_at,
+    )
+    db.execute(activity.on_conflict_do_update(
+        index_elements=[ProfileActivity.profile_id],
+        set_={
+            "post_count": ProfileActivity.post_count + 1,
+            "first_post_at": func.least(ProfileActivity.first_post_at, activity.excluded.first_post_at),
+            "last_post_at": func.greatest(ProfileActivity.last_post_at, activity.excluded.last_post_at),
+        },
+    ))
+
+
+def backfill_rollups():
+    with database.engine.begin() as conn:
+        if conn.execute(select(func.count()).select_from(ProfileActivity)).scalar():
+            return
+        source = (
+            "SELECT profile_id, category, COALESCE(post_timestamp, created_at) AS posted_at FROM posts "
+            "UNION ALL "
+            "SELECT profile_id, category, COALESCE(post_timestamp, created_at) FROM posts_archive"
+        )
+        conn.execute(text(
+            "INSERT INTO post_daily_rollups (user_id, profile_id, day, category, post_count) "
+            "SELECT pr.user_id, s.profile_id, s.posted_at::date, COALESCE(s.category, 'Other'), count(*) "
+            f"FROM ({source}) s JOIN profiles pr ON pr.id = s.profile_id "
+            "GROUP BY pr.user_id, s.profile_id, s.posted_at::date, COALESCE(s.category, 'Other') "
+            "ON CONFLICT DO NOTHING"
+        ))
+        rows = conn.execute(text(
+            "INSERT INTO profile_activity (profile_id, user_id, post_count, first_post_at, last_post_at) "
+            "SELECT s.profile_id, pr.user_id, count(*), min(s.posted_at), max(s.posted_at) "
+            f"FROM ({source}) s JOIN profiles pr ON pr.id = s.profile_id "
+            "GROUP BY s.profile_id, pr.user_id "
+            "ON CONFLICT DO NOTHING"
+        )).rowcount
+    if rows:
+        logger.info(f"Backfilled analytics rollups for {rows} profile(s).")
+
+
+async def get_analytics(db: AsyncSession, user_id: int, days: int = 30, profile_id: int | None = None) -> dict:
+    since = datetime.utcnow().date() - timedelta(days=days - 1)
+
+    series_q = select(
+        PostDailyRollup.day, PostDailyRollup.profile_id, PostDailyRollup.category, PostDailyRollup.post_count,
+    ).where(PostDailyRollup.user_id == user_id, PostDailyRollup.day >= since)
+    activity_q = select(
+        ProfileActivity.profile_id, Profile.name, ProfileActivity.post_count,
+        ProfileActivity.first_post_at, ProfileActivity.last_post_at,
+    ).join(Profile, Profile.id == ProfileActivity.profile_id).where(ProfileActivity.user_id == user_id)
+    if profile_id is not None:
+        series_q = series_q.where(PostDailyRollup.profile_id == profile_id)
+        activity_q = activity_q.where(ProfileActivity.profile_id == profile_id)
+
+    series = (await db.execute(series_q.order_by(PostDailyRollup.day))).all()
+    activity = (await db.execute(activity_q.order_by(ProfileActivity.last_post_at.desc()))).all()
+
+    totals = {}
+    for row in series:
+        totals[row.category] = totals.get(row.category, 0) + row.post_count
+
+    profiles = []
+    for row in activity:
+        cadence_days = None
+        if row.post_count > 1 and row.first_post_at and row.last_post_at:
+            span = (row.last_post_at - row.first_post_at).total_seconds() / 86400
+            cadence_days = round(span / (row.post_count - 1), 2)
+        profiles.append({
+            "profile_id": row.profile_id,
+            "name": row.name,
+            "post_count": row.post_count,
+            "last_post_at": row.last_post_at.isoformat() if row.last_post_at else None,
+            "avg_days_between_posts": cadence_days,
+        })
+
+    return {
+        "since": since.isoformat(),
+        "days": days,
+        "series": [
+            {
+                "day": row.day.isoformat(),
+                "profile_id": row.profile_id,
+                "category": row.category,
+                "count": row.post_count,
+            }
+            for row in series
+        ],
+        "totals": totals,
+        "profiles": profiles,
+    }
@@ -0,0 +1,100 @@
+import gzip
+import hashlib
+import logging
+import mimetypes
+import re
+from pathlib import Path
+import brotli
+from starlette.requests import Request
+from starlette.responses import Response
+
+logger = logging.getLogger(__name__)
+
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "no-cache"
+COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "image/svg+xml")
+ETAG_SUFFIXES = {"br": "br", "gzip": "gz"}
+STATIC_URL_RE = re.compile(r"""/static/([\w./-]+?)(\?v=[^"']*)?(?=["'])""")
+
+
+class Asset:
+    def __init__(self, name: str, content: bytes):
+        self.name = name
+        self.content = content
+        self.digest = hashlib.sha256(content).hexdigest()[:12]
+        stem, dot, suffix = name.rpartition(".")
+        self.hashed_name = f"{stem}.{self.digest}.{suffix}" if dot else f"{name}.{self.digest}"
+        self.media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        if self.media_type.startswith("text/"):
+            self.media_type += "; charset=utf-8"
+        self.encoded = {}
+        if self.media_type.startswith(COMPRESSIBLE_TYPES):
+            for encoding, compressed in (
+                ("br", brotli.compress(content, quality=11)),
+                ("gzip", gzip.compress(content, compresslevel=9, mtime=0)),
+            ):
+                if len(compressed) < len(content):
+                    self.encoded[encoding] = compressed
+        # Strong validators, so each content-coding needs its own.
+        self.etags = {None: f'"{self.digest}"'}
+        self.etags.update({encoding: f'"{self.digest}-{ETAG_SUFFIXES[encoding]}"' for encoding in self.encoded})
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    # If-None-Match uses weak comparison: any listed tag, W/ or not.
+    if if_none_match.strip() == "*":
+        return True
+    return etag in (t.strip().removeprefix("W/") for t in if_none_match.split(","))
+
+
+class AssetManifest:
+    def __init__(self, directory: Path):
+        self.assets: dict[str, Asset] = {}
+        self.by_hashed_name: dict[str, Asset] = {}
+        for path in sorted(directory.rglob("*")):
+            if not path.is_file():
+                continue
+            asset = Asset(path.relative_to(directory).as_posix(), path.read_bytes())
+            self.assets[asset.name] = asset
+            self.by_hashed_name[asset.hashed_name] = asset
+        logger.info(f"Loaded {len(self.assets)} static asset(s).")
+
+    def url(self, name: str) -> str:
+        asset = self.assets.get(name)
+        return f"/static/{asset.hashed_name}" if asset else f"/static/{name}"
+
+    def rewrite(self, html: str) -> str:
+        return STATIC_URL_RE.sub(lambda m: self.url(m.group(1)), html)
+
+    def response(self, request: Request, filename: str) -> Response:
+        asset = self.by_hashed_name.get(filename)
+        cache_control = IMMUTABLE_CACHE
+        if asset is None:
+            # Unhashed names still work for stale pages, but must revalidate.
+            asset = self.assets.get(filename)
+            cache_control = REVALIDATE_CACHE
+        if asset is None:
+            return Response(status_code=404)
+
+        accepted = {e.split(";")[0].strip() for e in request.headers.get("accept-encoding", "").split(",")}
+        encoding = next((e for e in ("br", "gzip") if e in accepted and e in asset.encoded), None)
+        headers = {"Cache-Control": cache_control, "ETag": asset.etags[encoding], "Vary": "Accept-Encoding"}
+        if etag_matches(request.headers.get("if-none-match", ""), asset.etags[encoding]):
+            return Response(status_code=304, headers=headers)
+
+        body = asset.content
+        if encoding:
+            body = asset.encoded[encoding]
+            headers["Content-Encoding"] = encoding
+        return Response(content=body, media_type=asset.media_type, headers=headers)
+
+
+class TemplateCache:
+    def __init__(self, directory: Path, manifest: AssetManifest):
+        self.templates = {
+            path.name: manifest.rewrite(path.read_text())
+            for path in sorted(directory.glob("*.html"))
+        }
+
+    def get(self, name: str) -> str:
+        return self.templates.get(name, f"<h1>Template '{name}' not found</h1>")
@@ -1,8 +1,15 @@
 import os
+import hmac
+import time
 import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
 from itsdangerous import URLSafeTimedSerializer
-from fastapi import Request, HTTPException
-from app.database import SessionLocal
+from fastapi import Request, HTTPException, Depends
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
 from app.models import User
 
 logger = logging.getLogger(__name__)
@@ -15,55 +22,141 @@ serializer = URLSafeTimedSerializer(SECRET_KEY)
 COOKIE_NAME = "session_token"
 TOKEN_MAX_AGE = 60 * 60 * 24 * 365
 
+# Operator-only endpoints (profiling) are disabled unless this is set and
+# sent back in the X-Admin-Token header.
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN", "")
 
-def create_session_token(user_id: int) -> str:
-    return serializer.dumps({"user_id": user_id})
+AUTH_CACHE_SIZE = int(os.environ.get("AUTH_CACHE_SIZE", "1024"))
+AUTH_CACHE_TTL = float(os.environ.get("AUTH_CACHE_TTL", "300"))
 
 
-def get_user_id_from_token(token: str) -> int | None:
+@dataclass(frozen=True)
+class CurrentUser:
+    id: int
+    username: str
+    display_name: str | None
+
+
+class IdentityCache:
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, tuple[float, CurrentUser]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> CurrentUser | None:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[token]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, token: str, user: CurrentUser):
+        with self._lock:
+            self._entries[token] = (time.monotonic() + self.ttl, user)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+identity_cache = IdentityCache(AUTH_CACHE_SIZE, AUTH_CACHE_TTL)
+
+
+def create_session_token(user_id: int, username: str | None = None, display_name: str | None = None) -> str:
+    data = {"user_id": user_id}
+    if username:
+        data["username"] = username
+        data["display_name"] = display_name
+    return serializer.dumps(data)
+
+
+def _load_token(token: str) -> dict | None:
     try:
         data = serializer.loads(token, max_age=TOKEN_MAX_AGE)
-        return data.get("user_id")
+        return data if isinstance(data, dict) else None
     except Exception:
         return None
 
 
-def get_current_user(request: Request) -> User | None:
+def get_user_id_from_token(token: str) -> int | None:
+    data = _load_token(token)
+    return data.get("user_id") if data else None
+
+
+async def _resolve_identity(token: str, db: AsyncSession) -> tuple[CurrentUser | None, str]:
+    user = identity_cache.get(token)
+    if user:
+        return user, "cache"
+    data = _load_token(token)
+    if not data or not data.get("user_id"):
+        return None, "invalid"
+    if data.get("username"):
+        user = CurrentUser(data["user_id"], data["username"], data.get("display_name"))
+        source = "token"
+    else:
+        result = await db.execute(
+            select(User.id, User.username, User.display_name).where(User.id == data["user_id"])
+        )
+        row = result.first()
+        if not row:
+            return None, "db"
+        user = CurrentUser(row.id, row.username, row.display_name)
+        source = "db"
+    identity_cache.put(token, user)
+    return user, source
+
+
+async def get_current_user(request: Request, db: AsyncSession = Depends(get_async_db)) -> CurrentUser | None:
     token = request.cookies.get(COOKIE_NAME)
     if not token:
         return None
-    user_id = get_user_id_from_token(token)
-    if not user_id:
-        return None
-    db = SessionLocal()
-    try:
-        user = db.query(User).filter(User.id == user_id).first()
-        return user
-    finally:
-        db.close()
+    started = time.perf_counter()
+    user, source = await _resolve_identity(token, db)
+    request.state.auth_timing = ((time.perf_counter() - started) * 1000, source)
+    return user
 
 
-def require_user(request: Request) -> User:
-    user = get_current_user(request)
+async def require_user(user: CurrentUser | None = Depends(get_current_user)) -> CurrentUser:
     if not user:
         raise HTTPException(status_code=401, detail="Not authenticated")
     return user
 
 
-def find_or_create_user(name: str) -> User:
-    db = SessionLocal()
-    try:
-        user = db.query(User).filter(User.username == name.lower().strip()).first()
-        if user:
-            return user
-        new_user = User(
-            username=name.lower().strip(),
-            display_name=name.strip(),
-        )
-        db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
-        logger.info(f"Created new user: {new_user.display_name}")
-        return new_user
-    finally:
-        db.close()
+def is_admin(request: Request) -> bool:
+    token = request.headers.get("x-admin-token", "")
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode())
+
+
+async def require_admin(request: Request):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not is_admin(request):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+
+async def find_or_create_user(db: AsyncSession, name: str) -> User:
+    username = name.lower().strip()
+    result = await db.execute(select(User).where(User.username == username))
+    user = result.scalars().first()
+    if user:
+        return user
+    new_user = User(
+        username=username,
+        display_name=name.strip(),
+    )
+    db.add(new_user)
+    await db.commit()
+    await db.refresh(new_user)
+    logger.info(f"Created new user: {new_user.display_name}")
+    return new_user
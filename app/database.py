@@ -1,29 +1,198 @@
 import os
+import sys
+import time
 import logging
-from sqlalchemy import create_engine
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
 from sqlalchemy.orm import sessionmaker
-from app.models import Base
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from app import metrics
+
+try:
+    import greenlet
+except ImportError:
+    greenlet = None
 
 logger = logging.getLogger(__name__)
 
 DATABASE_URL = os.environ.get("DATABASE_URL")
 
-if not DATABASE_URL:
-    raise RuntimeError("DATABASE_URL environment variable is not set")
+# Pool sizing applies to each engine (sync and async) separately.
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "30"))
+# Connections older than this are replaced at checkout. This is the default
+# liveness check; pre-ping adds a round trip to every checkout and is opt-in.
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", "300"))
+DB_POOL_PRE_PING = os.environ.get("DB_POOL_PRE_PING", "").lower() in ("1", "true", "yes")
+SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", "200"))
+
+_APP_DIR = str(Path(__file__).resolve().parent)
+
+
+class _TimedCheckout:
+    # Times Pool.connect(), which covers waiting for a free connection,
+    # opening a new one and any pre-ping.
+    engine_label = ""
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except PoolTimeoutError:
+            metrics.db_pool_timeouts_total.labels(self.engine_label).inc()
+            raise
+        finally:
+            metrics.db_pool_checkout_seconds.labels(self.engine_label).observe(time.perf_counter() - started)
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    engine_label = "sync"
+
+
+class TimedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    engine_label = "async"
+
+
+def _pool_options() -> dict:
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+def _first_app_frame(frame) -> str | None:
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(_APP_DIR) and not filename.endswith("database.py"):
+            return f"{Path(filename).name}:{frame.f_lineno} {frame.f_code.co_name}"
+        frame = frame.f_back
+    return None
+
+
+def _call_site() -> str:
+    site = _first_app_frame(sys._getframe(2))
+    if site is None and greenlet is not None:
+        # The async engine runs statements in a child greenlet; the
+        # awaiting coroutine chain is on the parent's suspended stack.
+        parent = greenlet.getcurrent().parent
+        if parent is not None:
+            site = _first_app_frame(parent.gr_frame)
+    return site or "unknown"
+
 
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
-SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+def _instrument_engine(sync_engine, label: str):
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
 
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        if elapsed * 1000 < SLOW_QUERY_MS:
+            return
+        site = _call_site()
+        metrics.db_slow_queries_total.labels(label, site).inc()
+        sql = " ".join(statement.split())[:300]
+        logger.warning(f"Slow query ({elapsed * 1000:.0f} ms, {label}) from {site}: {sql}")
 
-def init_db():
-    logger.info("Initializing database tables...")
-    Base.metadata.create_all(bind=engine)
-    logger.info("Database tables created successfully.")
+    @event.listens_for(sync_engine, "handle_error")
+    def _error(context):
+        # A failed statement never reaches after_cursor_execute.
+        started = context.connection.info.get("query_started") if context.connection is not None else None
+        if started:
+            started.pop()
+
+    # Read through the engine: dispose() swaps in a new pool object.
+    metrics.db_pool_size.labels(label).set_function(lambda: sync_engine.pool.size())
+    metrics.db_pool_checked_out.labels(label).set_function(lambda: sync_engine.pool.checkedout())
+    metrics.db_pool_overflow.labels(label).set_function(lambda: max(sync_engine.pool.overflow(), 0))
+
+
+# asyncpg rejects libpq's sslmode query param, so map it onto connect_args.
+def _async_database_url(url: str):
+    parsed = make_url(url)
+    if parsed.drivername in ("postgres", "postgresql", "postgresql+psycopg2", "postgresql+psycopg"):
+        parsed = parsed.set(drivername="postgresql+asyncpg")
+    connect_args = {}
+    sslmode = parsed.query.get("sslmode")
+    if sslmode:
+        parsed = parsed.difference_update_query(["sslmode"])
+        if sslmode != "disable":
+            connect_args["ssl"] = sslmode
+    return parsed, connect_args
+
+
+@dataclass(frozen=True)
+class _Engines:
+    engine: object
+    SessionLocal: sessionmaker
+    async_engine: object
+    AsyncSessionLocal: async_sessionmaker
+
+
+_engines: _Engines | None = None
+_engines_lock = threading.Lock()
+
+
+def _get_engines() -> _Engines:
+    # Engines (and the DB driver imports behind them) are built on first
+    # use, so importing this module never fails or pays for them; a missing
+    # DATABASE_URL surfaces on the first query instead of at import.
+    global _engines
+    if _engines is not None:
+        return _engines
+    with _engines_lock:
+        if _engines is None:
+            if not DATABASE_URL:
+                raise RuntimeError("DATABASE_URL environment variable is not set")
+            engine = create_engine(DATABASE_URL, poolclass=TimedQueuePool, **_pool_options())
+            _instrument_engine(engine, "sync")
+            async_url, async_connect_args = _async_database_url(DATABASE_URL)
+            async_engine = create_async_engine(
+                async_url, poolclass=TimedAsyncQueuePool, connect_args=async_connect_args, **_pool_options(),
+            )
+            _instrument_engine(async_engine.sync_engine, "async")
+            _engines = _Engines(
+                engine=engine,
+                SessionLocal=sessionmaker(bind=engine, autocommit=False, autoflush=False),
+                async_engine=async_engine,
+                AsyncSessionLocal=async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False),
+            )
+    return _engines
+
+
+def __getattr__(name: str):
+    # database.engine, database.SessionLocal, database.async_engine and
+    # database.AsyncSessionLocal resolve lazily. Import the module, not the
+    # names, so the lookup happens at call time.
+    if name in _Engines.__dataclass_fields__:
+        return getattr(_get_engines(), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+async def dispose_engines():
+    if _engines is not None:
+        _engines.engine.dispose()
+        await _engines.async_engine.dispose()
 
 
 def get_db():
-    db = SessionLocal()
+    db = _get_engines().SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with _get_engines().AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,167 @@
+from html import escape
+from string import Formatter
+
+# Digest emails are rendered from templates compiled once at import time.
+# Each template becomes a small Python function returning an f-string, with
+# every field escaped for where it sits (text node or attribute value).
+# Renders append to one list buffer that is joined at the end, and the
+# plain-text and HTML bodies come out of the same pass over the entries.
+
+
+def _escape_text(value) -> str:
+    value = str(value)
+    # Most values need no escaping; skip the replace chain for those.
+    if "&" in value or "<" in value or ">" in value:
+        return escape(value, quote=False)
+    return value
+
+
+def _escape_attr(value) -> str:
+    value = str(value)
+    if "&" in value or "<" in value or ">" in value or '"' in value or "'" in value:
+        return escape(value, quote=True)
+    return value
+
+
+def _in_attribute(preceding: str) -> bool:
+    tag = preceding[preceding.rfind("<"):]
+    return ">" not in tag and tag.count('"') % 2 == 1
+
+
+class CompiledTemplate:
+    def __init__(self, source: str, autoescape: bool = True):
+        lines = ["def render(values):"]
+        body = []
+        preceding = ""
+        for literal, field, _, _ in Formatter().parse(source):
+            preceding += literal
+            body.append(literal.replace("{", "{{").replace("}", "}}"))
+            if field is None:
+                continue
+            if not autoescape:
+                escaper = "str"
+            else:
+                escaper = "_escape_attr" if _in_attribute(preceding) else "_escape_text"
+            name = f"_{len(lines) - 1}"
+            lines.append(f"    {name} = {escaper}(values[{field!r}])")
+            body.append(f"{{{name}}}")
+        lines.append(f"    return f{''.join(body)!r}")
+        namespace = {"_escape_text": _escape_text, "_escape_attr": _escape_attr}
+        exec(compile("\n".join(lines), f"<template {source.strip()[:30]!r}>", "exec"), namespace)
+        self.render = namespace["render"]
+
+    def render_into(self, out: list[str], values: dict):
+        out.append(self.render(values))
+
+
+CATEGORY_COLORS = {
+    "Funding": "#2e7d32",
+    "Hiring": "#e65100",
+    "Launch": "#1565c0",
+    "Other": "#616161",
+}
+
+_PAGE_OPEN = CompiledTemplate("""
+    <html>
+    <body style="font-family:-apple-system,BlinkMacSystemFont,'Segoe UI',Roboto,sans-serif; background:#f0f2f5; padding:20px;">
+        <div style="max-width:600px; margin:0 auto; background:white; border-radius:10px; overflow:hidden; box-shadow:0 2px 8px rgba(0,0,0,0.1);">
+            <div style="background:#0a66c2; color:white; padding:20px 24px;">
+                <h1 style="margin:0; font-size:20px;">Daily Relationship Update</h1>
+                <p style="margin:4px 0 0; opacity:0.9; font-size:14px;">{subtitle}</p>
+            </div>""")
+
+_PAGE_CLOSE = CompiledTemplate("""
+            <div style="padding:16px 24px; text-align:center; color:#999; font-size:12px;">
+                LinkedIn Relationship Intelligence Tool
+            </div>
+        </div>
+    </body>
+    </html>""")
+
+_TABLE_OPEN = CompiledTemplate("""
+            <table style="width:100%; border-collapse:collapse;">""")
+
+_TABLE_CLOSE = CompiledTemplate("""
+            </table>""")
+
+_HTML_ROW_SOURCE = """
+        <tr>
+            <td style="padding:16px; border-bottom:1px solid #eee;">
+                <div style="font-weight:600; font-size:15px; margin-bottom:6px;">{name}</div>
+                <div style="display:inline-block; background:{color}; color:white; padding:2px 10px; border-radius:12px; font-size:12px; font-weight:600; margin-bottom:8px;">{category}</div>
+                <div style="font-size:14px; color:#333; margin-bottom:8px;">{summary}</div>
+                <div style="background:#f8f9fa; border-left:3px solid #0a66c2; padding:8px 12px; font-size:13px; color:#555; margin-bottom:8px;">
+                    <strong style="color:#0a66c2; font-size:11px; text-transform:uppercase;">Suggested Reply</strong><br>{reply}
+                </div>
+                <div>{link}</div>
+            </td>
+        </tr>"""
+
+_HTML_ROW = CompiledTemplate(_HTML_ROW_SOURCE.replace(
+    "{link}", """<a href="{post_url}" style="color:#0a66c2;">View Post</a>""",
+))
+_HTML_ROW_NO_LINK = CompiledTemplate(_HTML_ROW_SOURCE.replace("{link}", "N/A"))
+
+_HTML_EMPTY = CompiledTemplate("""
+            <div style="padding:32px 24px; text-align:center;">
+                <p style="font-size:16px; color:#333; margin:0 0 8px;">No new posts were found from {names}.</p>
+                <p style="font-size:14px; color:#888; margin:0;">We'll check again tomorrow!</p>
+            </div>""")
+
+_TEXT_ROW = CompiledTemplate(
+    "Name: {name}\n"
+    "Category: {category}\n"
+    "Summary: {summary}\n"
+    "Suggested Reply: {reply}\n"
+    "Post Link: {post_url}\n"
+    + "-" * 30 + "\n\n",
+    autoescape=False,
+)
+
+_TEXT_HEADER = "Daily Relationship Update\n" + "=" * 30 + "\n\n"
+
+
+def _safe_url(url: str | None) -> bool:
+    # Only http(s) links make it into an href; anything else is dropped.
+    return bool(url) and url[:8].lower().startswith(("https://", "http://"))
+
+
+def render_email_digest(entries: list[dict], profile_names: list[str] | None = None) -> tuple[str, str, str]:
+    if not entries:
+        names = ", ".join(profile_names) if profile_names else "your tracked profiles"
+        html = []
+        _PAGE_OPEN.render_into(html, {"subtitle": "No new posts today"})
+        _HTML_EMPTY.render_into(html, {"names": names})
+        _PAGE_CLOSE.render_into(html, {})
+        return (
+            "Daily Relationship Update - No new posts today",
+            f"No new posts were found today from {names}.\nWe'll check again tomorrow!",
+            "".join(html),
+        )
+
+    html = []
+    text = [_TEXT_HEADER]
+    _PAGE_OPEN.render_into(html, {"subtitle": f"{len(entries)} new post(s) detected"})
+    _TABLE_OPEN.render_into(html, {})
+    add_html, add_text = html.append, text.append
+    render_text, render_row, render_row_no_link = _TEXT_ROW.render, _HTML_ROW.render, _HTML_ROW_NO_LINK.render
+    for entry in entries:
+        category = entry.get("category") or "Other"
+        post_url = entry.get("post_url")
+        values = {
+            "name": entry.get("name") or "Unknown",
+            "category": category,
+            "color": CATEGORY_COLORS.get(category, CATEGORY_COLORS["Other"]),
+            "summary": entry.get("summary") or "N/A",
+            "reply": entry.get("suggested_reply") or "N/A",
+            "post_url": post_url or "N/A",
+        }
+        add_text(render_text(values))
+        add_html(render_row(values) if _safe_url(post_url) else render_row_no_link(values))
+    _TABLE_CLOSE.render_into(html, {})
+    _PAGE_CLOSE.render_into(html, {})
+    return (
+        f"Daily Relationship Update - {len(entries)} new post(s)",
+        "".join(text).rstrip("\n"),
+        "".join(html),
+    )
@@ -0,0 +1,66 @@
+import asyncio
+import json
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+class EventBroker:
+    # In-process pub/sub for per-user dashboard events. Publishers may run
+    # on the scheduler thread, so delivery is marshalled onto each
+    # subscriber's event loop.
+    def __init__(self):
+        self._subscribers: dict[int, set[tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id: int) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, user_id: int, queue: asyncio.Queue):
+        with self._lock:
+            subs = self._subscribers.get(user_id)
+            if not subs:
+                return
+            subs.discard(next((s for s in subs if s[1] is queue), None))
+            if not subs:
+                del self._subscribers[user_id]
+
+    def subscriber_count(self, user_id: int | None = None) -> int:
+        with self._lock:
+            if user_id is not None:
+                return len(self._subscribers.get(user_id, ()))
+            return sum(len(subs) for subs in self._subscribers.values())
+
+    def publish(self, user_id: int | None, event: str, data: dict):
+        if user_id is None:
+            return
+        with self._lock:
+            subs = list(self._subscribers.get(user_id, ()))
+        for loop, queue in subs:
+            try:
+                loop.call_soon_threadsafe(_offer, queue, (event, data))
+            except RuntimeError:
+                # Loop already closed; the subscriber is going away.
+                pass
+
+
+def _offer(queue: asyncio.Queue, item):
+    if queue.full():
+        try:
+            queue.get_nowait()
+        except asyncio.QueueEmpty:
+            pass
+    queue.put_nowait(item)
+
+
+def format_sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+broker = EventBroker()
@@ -0,0 +1,149 @@
+import csv
+import io
+import json
+import logging
+from datetime import date, datetime, time, timedelta
+from itertools import groupby
+from sqlalchemy import select, union_all
+from app import database
+from app.models import Post, PostArchive, Profile, Notification, NotificationPost
+
+logger = logging.getLogger(__name__)
+
+EXPORT_BATCH_SIZE = 500
+EXPORT_FORMATS = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson"}
+
+POST_EXPORT_FIELDS = [
+    "id", "profile_id", "profile_name", "post_url", "post_timestamp", "created_at",
+    "category", "summary", "suggested_reply", "post_text",
+]
+NOTIFICATION_EXPORT_FIELDS = ["id", "type", "title", "body", "is_read", "created_at", "post_ids"]
+
+
+def _value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        return " ".join(str(v) for v in value)
+    return _value(value)
+
+
+class _Encoder:
+    # Renders one record per line. CSV goes through a reused writer/buffer
+    # pair so each record costs one small string, never the whole export.
+    def __init__(self, fmt: str, fields: list[str]):
+        self.fmt = fmt
+        self.fields = fields
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+
+    def header(self) -> str:
+        return self._csv(self.fields) if self.fmt == "csv" else ""
+
+    def encode(self, record: dict) -> str:
+        if self.fmt == "csv":
+            return self._csv([_csv_value(record[f]) for f in self.fields])
+        return json.dumps({f: _value(record[f]) for f in self.fields}) + "\n"
+
+    def _csv(self, values) -> str:
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        self._writer.writerow(values)
+        return self._buffer.getvalue()
+
+
+def _date_bounds(column, since: date | None, until: date | None) -> list:
+    clauses = []
+    if since:
+        clauses.append(column >= datetime.combine(since, time.min))
+    if until:
+        clauses.append(column < datetime.combine(until + timedelta(days=1), time.min))
+    return clauses
+
+
+def _posts_query(model, user_id: int, since: date | None, until: date | None, profile_id: int | None):
+    stmt = (
+        select(
+            model.id, model.profile_id, Profile.name.label("profile_name"), model.post_url,
+            model.post_timestamp, model.created_at, model.category, model.summary,
+            model.suggested_reply, model.post_text,
+        )
+        .join(Profile, Profile.id == model.profile_id)
+        .where(Profile.user_id == user_id, *_date_bounds(model.created_at, since, until))
+    )
+    if profile_id is not None:
+        stmt = stmt.where(model.profile_id == profile_id)
+    return stmt.order_by(model.created_at, model.id)
+
+
+async def stream_posts(fmt: str, user_id: int, since: date | None = None, until: date | None = None,
+                       profile_id: int | None = None):
+    # Runs after the handler has returned, so it owns its session rather than
+    # borrowing the request's. Archived posts follow the live partitions.
+    encoder = _Encoder(fmt, POST_EXPORT_FIELDS)
+    yield encoder.header()
+    exported = 0
+    async with database.AsyncSessionLocal() as db:
+        for model in (PostArchive, Post):
+            stmt = _posts_query(model, user_id, since, until, profile_id)
+            result = await db.stream(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+            async for rows in result.partitions():
+                yield "".join(encoder.encode(row._mapping) for row in rows)
+                exported += len(rows)
+    logger.info(f"Exported {exported} post(s) as {fmt} (user_id={user_id}).")
+
+
+async def stream_notifications(fmt: str, user_id: int, since: date | None = None, until: date | None = None,
+                               profile_id: int | None = None):
+    encoder = _Encoder(fmt, NOTIFICATION_EXPORT_FIELDS)
+    yield encoder.header()
+    stmt = (
+        select(
+            Notification.id, Notification.type, Notification.title, Notification.body,
+            Notification.is_read, Notification.created_at, NotificationPost.post_id,
+        )
+        .outerjoin(NotificationPost, NotificationPost.notification_id == Notification.id)
+        .where(Notification.user_id == user_id, *_date_bounds(Notification.created_at, since, until))
+    )
+    if profile_id is not None:
+        # Archived posts count too, as in stream_posts.
+        profile_posts = union_all(*(
+            select(model.id).where(model.profile_id == profile_id) for model in (PostArchive, Post)
+        )).subquery()
+        linked = (
+            select(NotificationPost.notification_id)
+            .join(profile_posts, profile_posts.c.id == NotificationPost.post_id)
+        )
+        stmt = stmt.where(Notification.id.in_(linked))
+    stmt = stmt.order_by(Notification.created_at, Notification.id, NotificationPost.position)
+
+    exported = 0
+    async with database.AsyncSessionLocal() as db:
+        result = await db.stream(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        # One row per linked post, ordered by notification. A notification's
+        # rows can straddle batches, so the last one is held back until a
+        # row for the next notification shows up.
+        pending = None
+        async for rows in result.partitions():
+            chunk = []
+            for notif_id, group in groupby(rows, key=lambda r: r.id):
+                group = list(group)
+                if pending and pending["id"] == notif_id:
+                    pending["post_ids"] += [r.post_id for r in group if r.post_id is not None]
+                    continue
+                if pending:
+                    chunk.append(encoder.encode(pending))
+                    exported += 1
+                pending = dict(group[0]._mapping)
+                pending["post_ids"] = [r.post_id for r in group if r.post_id is not None]
+            yield "".join(chunk)
+        if pending:
+            yield encoder.encode(pending)
+            exported += 1
+    logger.info(f"Exported {exported} notification(s) as {fmt} (user_id={user_id}).")
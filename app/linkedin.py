@@ -4,11 +4,14 @@ import logging
 import time
 from datetime import datetime
 import requests
+from app import metrics
 
 logger = logging.getLogger(__name__)
 
 RAPIDAPI_HOST = "fresh-linkedin-scraper-api.p.rapidapi.com"
-RAPIDAPI_BASE = f"https://{RAPIDAPI_HOST}"
+RAPIDAPI_BASE = os.environ.get("RAPIDAPI_BASE_URL", f"https://{RAPIDAPI_HOST}")
+# Pause between the URN lookup and the posts fetch to stay under the plan's rate limit.
+RAPIDAPI_REQUEST_DELAY = float(os.environ.get("RAPIDAPI_REQUEST_DELAY", "1"))
 
 
 def _get_api_key():
@@ -37,20 +40,26 @@ def _get_headers():
 
 def _get_user_urn(username: str) -> str:
     url = f"{RAPIDAPI_BASE}/api/v1/user/profile"
-    try:
-        resp = requests.get(url, headers=_get_headers(), params={"username": username}, timeout=30)
-        resp.raise_for_status()
-        data = resp.json()
-        if data.get("success") and isinstance(data.get("data"), dict):
-            urn = data["data"].get("urn", "")
-            if urn:
-                logger.info(f"Got URN for {username}: {urn}")
-                return urn
-        logger.warning(f"No URN found for {username}")
-        return ""
-    except Exception as e:
-        logger.error(f"Failed to get profile/URN for {username}: {e}")
-        return ""
+    with metrics.track(metrics.URN_LOOKUP, "rapidapi") as stage:
+        try:
+            resp = requests.get(url, headers=_get_headers(), params={"username": username}, timeout=30)
+            if resp.status_code == 429:
+                stage.outcome = "rate_limited"
+            resp.raise_for_status()
+            data = resp.json()
+            if data.get("success") and isinstance(data.get("data"), dict):
+                urn = data["data"].get("urn", "")
+                if urn:
+                    logger.info(f"Got URN for {username}: {urn}")
+                    return urn
+            stage.outcome = "not_found"
+            logger.warning(f"No URN found for {username}")
+            return ""
+        except Exception as e:
+            if stage.outcome == "ok":
+                stage.outcome = "error"
+            logger.error(f"Failed to get profile/URN for {username}: {e}")
+            return ""
 
 
 async def get_recent_posts(linkedin_url: str) -> list[dict]:
@@ -67,12 +76,17 @@ async def get_recent_posts(linkedin_url: str) -> list[dict]:
     if not urn:
         return []
 
-    time.sleep(1)
+    time.sleep(RAPIDAPI_REQUEST_DELAY)
 
     try:
         url = f"{RAPIDAPI_BASE}/api/v1/user/posts"
         logger.info(f"Fetching posts for {username}...")
-        resp = requests.get(url, headers=_get_headers(), params={"urn": urn, "page": "1"}, timeout=30)
+        with metrics.track(metrics.POSTS_FETCH, "rapidapi") as stage:
+            resp = requests.get(url, headers=_get_headers(), params={"urn": urn, "page": "1"}, timeout=30)
+            if resp.status_code == 429:
+                stage.outcome = "rate_limited"
+            elif resp.status_code >= 400:
+                stage.outcome = "http_error"
 
         if resp.status_code == 429:
             logger.warning("Rate limited by API. Try again later.")
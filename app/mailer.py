@@ -0,0 +1,131 @@
+import logging
+import os
+import smtplib
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+SMTP_CONNECTIONS_PER_SERVER = int(os.environ.get("SMTP_CONNECTIONS_PER_SERVER", "2"))
+SMTP_IDLE_TIMEOUT = int(os.environ.get("SMTP_IDLE_TIMEOUT", "60"))
+SMTP_TIMEOUT = 30
+
+# Errors where the server turned down this message but the session is fine.
+REJECTED = (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused)
+
+
+class SMTPConnectionPool:
+    # Keeps logged-in SMTP sessions per (host, port, user) so a batch of
+    # messages pays for STARTTLS and AUTH once per connection, not per
+    # message. Each key gets at most SMTP_CONNECTIONS_PER_SERVER sessions
+    # in flight; idle sessions past SMTP_IDLE_TIMEOUT are closed.
+    def __init__(self, per_server: int = SMTP_CONNECTIONS_PER_SERVER, idle_timeout: int = SMTP_IDLE_TIMEOUT):
+        self.per_server = per_server
+        self.idle_timeout = idle_timeout
+        self._idle: dict[tuple, deque] = {}
+        self._slots: dict[tuple, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.reuses = 0
+
+    def send(self, host: str, port: int, user: str, password: str, to_addr: str, message: str):
+        key = (host, port, user)
+        with self._lock:
+            slot = self._slots.setdefault(key, threading.BoundedSemaphore(self.per_server))
+        with slot:
+            server = self._checkout(key)
+            if server is not None:
+                try:
+                    server.sendmail(user, to_addr, message)
+                    self._checkin(key, server)
+                    return
+                except smtplib.SMTPServerDisconnected:
+                    # The server dropped the idle session; retry once on a fresh one.
+                    self._close(server)
+                except REJECTED:
+                    self._reset(key, server)
+                    raise
+                except Exception:
+                    self._close(server)
+                    raise
+
+            server = self._connect(host, port, user, password)
+            try:
+                server.sendmail(user, to_addr, message)
+            except REJECTED:
+                self._reset(key, server)
+                raise
+            except Exception:
+                self._close(server)
+                raise
+            self._checkin(key, server)
+
+    def close_idle(self, force: bool = False):
+        cutoff = time.monotonic() - self.idle_timeout
+        stale = []
+        with self._lock:
+            for idle in self._idle.values():
+                keep = [(s, t) for s, t in idle if not force and t >= cutoff]
+                stale.extend(s for s, t in idle if force or t < cutoff)
+                idle.clear()
+                idle.extend(keep)
+        for server in stale:
+            self._close(server)
+
+    def _connect(self, host: str, port: int, user: str, password: str) -> smtplib.SMTP:
+        server = smtplib.SMTP(host, port, timeout=SMTP_TIMEOUT)
+        try:
+            server.ehlo()
+            server.starttls()
+            server.ehlo()
+            server.login(user, password)
+        except Exception:
+            self._close(server)
+            raise
+        self.connects += 1
+        return server
+
+    def _checkout(self, key: tuple) -> smtplib.SMTP | None:
+        cutoff = time.monotonic() - self.idle_timeout
+        stale = []
+        server = None
+        with self._lock:
+            idle = self._idle.get(key)
+            while idle:
+                candidate, last_used = idle.pop()
+                if last_used >= cutoff:
+                    server = candidate
+                    break
+                stale.append(candidate)
+        for s in stale:
+            self._close(s)
+        if server is not None:
+            self.reuses += 1
+        return server
+
+    def _checkin(self, key: tuple, server: smtplib.SMTP):
+        with self._lock:
+            self._idle.setdefault(key, deque()).append((server, time.monotonic()))
+
+    def _reset(self, key: tuple, server: smtplib.SMTP):
+        # A rejected message leaves the session usable once the transaction is reset.
+        try:
+            server.rset()
+        except Exception:
+            self._close(server)
+            return
+        self._checkin(key, server)
+
+    @staticmethod
+    def _close(server: smtplib.SMTP):
+        try:
+            server.quit()
+        except Exception:
+            try:
+                server.close()
+            except Exception:
+                pass
+
+
+smtp_pool = SMTPConnectionPool()
@@ -1,29 +1,36 @@
 import os
+import sys
 import logging
 from pathlib import Path
 from contextlib import asynccontextmanager
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 
 from dotenv import load_dotenv
 load_dotenv()
 
+import asyncio
 import csv
 import io
 
-from sqlalchemy import or_, and_
+from sqlalchemy import or_, select, func, update
 
-from fastapi import FastAPI, Depends, HTTPException, Request, Form, UploadFile, File
-from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
-from fastapi.staticfiles import StaticFiles
-from sqlalchemy.orm import Session
-from pydantic import BaseModel
+from fastapi import FastAPI, Depends, HTTPException, Request, Form, UploadFile, File, Query
+from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse, Response, StreamingResponse, FileResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field
 
-from app.database import init_db, get_db, SessionLocal
+from app.database import get_async_db, dispose_engines
 from app.models import Profile, Post, Notification, User, Settings
-from app.scheduler import start_scheduler, run_daily_job
+from app import versions
+from app.events import broker, format_sse
+from app.assets import AssetManifest, TemplateCache
+from app.metrics import MetricsMiddleware, metrics_response, suggested_replies_total
+from app import profiling
+from app.startup import BackgroundStartup
 from app.auth import (
     create_session_token, find_or_create_user,
-    get_current_user, require_user, COOKIE_NAME
+    get_current_user, require_user, require_admin, is_admin, CurrentUser, COOKIE_NAME
 )
 
 BASE_DIR = Path(__file__).resolve().parent
@@ -35,12 +42,25 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+startup = BackgroundStartup()
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    init_db()
-    start_scheduler()
+    # Schema changes are applied by `python -m app.migrations`; the
+    # database check and scheduler come up in the background so the app
+    # serves as soon as it is imported.
+    startup.start()
     logger.info("Application started successfully.")
     yield
+    startup.stop()
+    # Only close clients that were actually created; importing them here
+    # would build them just to tear them down.
+    if "app.mailer" in sys.modules:
+        sys.modules["app.mailer"].smtp_pool.close_idle(force=True)
+    if "app.slack" in sys.modules:
+        sys.modules["app.slack"].slack_client.close()
+    await dispose_engines()
     logger.info("Application shutting down.")
 
 
@@ -54,15 +74,27 @@ app = FastAPI(
 from starlette.middleware import Middleware
 from starlette.middleware.base import BaseHTTPMiddleware
 
-class NoCacheStaticMiddleware(BaseHTTPMiddleware):
+
+class ServerTimingMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request, call_next):
         response = await call_next(request)
-        if request.url.path.startswith("/static/"):
-            response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
+        auth_timing = getattr(request.state, "auth_timing", None)
+        if auth_timing:
+            duration_ms, source = auth_timing
+            response.headers["Server-Timing"] = f'auth;dur={duration_ms:.3f};desc="{source}"'
         return response
 
-app.add_middleware(NoCacheStaticMiddleware)
-app.mount("/static", StaticFiles(directory=str(BASE_DIR / "static")), name="static")
+app.add_middleware(ServerTimingMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(profiling.ProfilingMiddleware)
+
+assets = AssetManifest(BASE_DIR / "static")
+templates = TemplateCache(BASE_DIR / "templates", assets)
+
+
+@app.get("/static/{filename:path}", include_in_schema=False)
+async def static_file(filename: str, request: Request):
+    return assets.response(request, filename)
 
 
 class ProfileCreate(BaseModel):
@@ -90,23 +122,104 @@ class PostResponse(BaseModel):
     summary: str | None
     category: str | None
     suggested_reply: str | None
+    duplicate_of_id: int | None = None
     created_at: datetime
 
     class Config:
         from_attributes = True
 
 
+class PostSummaryResponse(BaseModel):
+    id: int
+    profile_id: int
+    post_preview: str
+    post_text_truncated: bool
+    post_url: str | None
+    post_timestamp: datetime | None
+    summary: str | None
+    category: str | None
+    suggested_reply: str | None
+    duplicate_of_id: int | None = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class DigestEntryResponse(BaseModel):
+    post_id: int
+    name: str
+    category: str | None
+    summary: str | None
+    post_url: str | None
+
+
+class NotificationResponse(BaseModel):
+    id: int
+    title: str
+    body: str
+    type: str
+    is_read: int
+    created_at: datetime | None
+    entries: list[DigestEntryResponse] = []
+
+    class Config:
+        from_attributes = True
+
+
+class EmailSettingsResponse(BaseModel):
+    notify_email: str
+    smtp_host: str
+    smtp_port: str
+    smtp_user: str
+    smtp_password: str
+
+
+class BootstrapResponse(BaseModel):
+    me: dict
+    profiles: list[ProfileResponse]
+    posts: list[PostSummaryResponse]
+    notifications: list[NotificationResponse]
+    unread_count: int
+    email_settings: EmailSettingsResponse
+    slack_settings: dict
+    linkedin_settings: dict
+    health: dict
+
+
+POST_PREVIEW_CHARS = 200
+
+# List views only need a preview, so the full post_text never leaves Postgres.
+POST_SUMMARY_COLUMNS = (
+    Post.id,
+    Post.profile_id,
+    func.substr(Post.post_text, 1, POST_PREVIEW_CHARS).label("post_preview"),
+    (func.length(Post.post_text) > POST_PREVIEW_CHARS).label("post_text_truncated"),
+    Post.post_url,
+    Post.post_timestamp,
+    Post.summary,
+    Post.category,
+    Post.suggested_reply,
+    Post.duplicate_of_id,
+    Post.created_at,
+)
+
+
+def _conditional(request: Request, response: Response, etag: str) -> Response | None:
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    response.headers.update(headers)
+    if_none_match = request.headers.get("if-none-match", "")
+    if if_none_match.strip() == "*" or etag in [t.strip() for t in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    return None
+
+
 def _read_template(name: str) -> str:
-    html_path = BASE_DIR / "templates" / name
-    try:
-        return html_path.read_text()
-    except FileNotFoundError:
-        return f"<h1>Template '{name}' not found</h1>"
+    return templates.get(name)
 
 
 @app.get("/", response_class=HTMLResponse)
-def root(request: Request):
-    user = get_current_user(request)
+async def root(user: CurrentUser | None = Depends(get_current_user)):
     if not user:
         return HTMLResponse(
             content=_read_template("login.html"),
@@ -119,7 +232,7 @@ def root(request: Request):
 
 
 @app.post("/enter")
-async def enter_submit(request: Request):
+async def enter_submit(request: Request, db: AsyncSession = Depends(get_async_db)):
     form = await request.form()
     name = form.get("name", "").strip()
 
@@ -133,8 +246,8 @@ async def enter_submit(request: Request):
             headers={"Cache-Control": "no-cache, no-store, must-revalidate"},
         )
 
-    user = find_or_create_user(name)
-    token = create_session_token(user.id)
+    user = await find_or_create_user(db, name)
+    token = create_session_token(user.id, user.username, user.display_name)
     response = RedirectResponse(url="/", status_code=302)
     response.set_cookie(COOKIE_NAME, token, httponly=True, samesite="lax", max_age=60*60*24*365)
     return response
@@ -147,11 +260,7 @@ def switch_user():
     return response
 
 
-@app.get("/api/me")
-def get_me(request: Request):
-    user = get_current_user(request)
-    if not user:
-        raise HTTPException(status_code=401, detail="Not authenticated")
+def _me(user: CurrentUser) -> dict:
     return {
         "id": user.id,
         "username": user.username,
@@ -159,19 +268,59 @@ def get_me(request: Request):
     }
 
 
+@app.get("/api/me")
+async def get_me(user: CurrentUser = Depends(require_user)):
+    return _me(user)
+
+
 @app.get("/health")
-def health():
-    return {"status": "healthy"}
+async def health():
+    # Liveness: answers as soon as the app is imported, before the
+    # database and scheduler are up. Use /ready to gate traffic.
+    return {"status": "healthy", "ready": startup.ready, "subsystems": startup.status}
+
+
+@app.get("/ready")
+async def ready():
+    body = {"ready": startup.ready, "subsystems": startup.status}
+    return JSONResponse(body, status_code=200 if startup.ready else 503)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return metrics_response()
+
+
+@app.get("/api/bootstrap", response_model=BootstrapResponse)
+async def bootstrap(user: CurrentUser = Depends(require_user), db: AsyncSession = Depends(get_async_db)):
+    from app.notify import get_notifications, get_unread_count
+    # An AsyncSession runs one statement at a time, so these share the
+    # request's single connection back to back instead of fanning out.
+    profiles = await _fetch_profiles(db, user.id)
+    posts = await _fetch_recent_posts(db, user.id, limit=50)
+    notifs = await get_notifications(db, 50, user_id=user.id)
+    unread = await get_unread_count(db, user_id=user.id)
+    email_settings = await _masked_email_settings(db, user.id)
+    slack_settings = await _slack_settings(db, user.id)
+    return {
+        "me": _me(user),
+        "profiles": profiles,
+        "posts": posts,
+        "notifications": notifs,
+        "unread_count": unread,
+        "email_settings": email_settings,
+        "slack_settings": slack_settings,
+        "linkedin_settings": _linkedin_settings(),
+        "health": {"status": "healthy"},
+    }
 
 
 @app.post("/profiles", response_model=ProfileResponse)
-def create_profile(profile: ProfileCreate, request: Request, db: Session = Depends(get_db)):
-    user = require_user(request)
-
-    existing = db.query(Profile).filter(
+async def create_profile(profile: ProfileCreate, user: CurrentUser = Depends(require_user), db: AsyncSession = Depends(get_async_db)):
+    existing = await db.scalar(select(Profile.id).where(
         Profile.linkedin_url == profile.linkedin_url,
         Profile.user_id == user.id
-    ).first()
+    ))
     if existing:
         raise HTTPException(status_code=400, detail="You already track this LinkedIn profile.")
 
@@ -182,16 +331,15 @@ def create_profile(profile: ProfileCreate, request: Request, db: Session = Depen
         type="person",
     )
     db.add(new_profile)
-    db.commit()
-    db.refresh(new_profile)
+    await db.commit()
+    await db.refresh(new_profile)
+    versions.bump(user.id, versions.PROFILES)
     logger.info(f"Created profile: {new_profile.name} for user {user.display_name}")
     return new_profile
 
 
 @app.post("/profiles/upload-csv")
-async def upload_csv(request: Request, file: UploadFile = File(...), db: Session = Depends(get_db)):
-    user = require_user(request)
-
+async def upload_csv(file: UploadFile = File(...), user: CurrentUser = Depends(require_user), db: AsyncSession = Depends(get_async_db)):
     if not file.filename or not file.filename.lower().endswith(".csv"):
         raise HTTPException(status_code=400, detail="Please upload a .csv file.")
 
@@ -236,10 +384,10 @@ async def upload_csv(request: Request, file: UploadFile = File(...), db: Session
         if not linkedin_url.startswith("http"):
             linkedin_url = "https://" + linkedin_url
 
-        existing = db.query(Profile).filter(
+        existing = await db.scalar(select(Profile.id).where(
             Profile.linkedin_url == linkedin_url,
             Profile.user_id == user.id
-        ).first()
+        ))
         if existing:
             skipped += 1
             continue
@@ -252,12 +400,14 @@ async def upload_csv(request: Request, file: UploadFile = File(...), db: Session
                 type="person",
             )
             db.add(new_profile)
-            db.commit()
+            await db.commit()
             added += 1
         except Exception as e:
-            db.rollback()
+            await db.rollback()
             errors.append(f"Row {row_num}: {str(e)}")
 
+    if added:
+        versions.bump(user.id, versions.PROFILES)
     logger.info(f"CSV upload by {user.display_name}: {added} added, {skipped} skipped")
     return {
         "added": added,
@@ -267,76 +417,253 @@ async def upload_csv(request: Request, file: UploadFile = File(...), db: Session
     }
 
 
+async def _fetch_profiles(db: AsyncSession, user_id: int) -> list[Profile]:
+    result = await db.execute(select(Profile).where(Profile.user_id == user_id))
+    return result.scalars().all()
+
+
 @app.get("/profiles", response_model=list[ProfileResponse])
-def list_profiles(request: Request, db: Session = Depends(get_db)):
-    user = require_user(request)
-    return db.query(Profile).filter(Profile.user_id == user.id).all()
+async def list_profiles(request: Request, response: Response, user: CurrentUser = Depends(require_user), db: AsyncSession = Depends(get_async_db)):
+    not_modified = _conditional(request, response, versions.etag(user.id, versions.PROFILES))
+    if not_modified:
+        return not_modified
+    return await _fetch_profiles(db, user.id)
 
 
-@app.get("/profiles/{profile_id}", response_model=ProfileResponse)
-def get_profile(profile_id: int, request: Request, db: Session = Depends(get_db)):
-    user = require_user(request)
-    profile = db.query(Profile).filter(Profile.id == profile_id, Profile.user_id == user.id).first()
+async def _get_user_profile(db: AsyncSession, profile_id: int, user_id: int) -> Profile:
+    profile = await db.scalar(select(Profile).where(Profile.id == profile_id, Profile.user_id == user_id))
     if not profile:
         raise HTTPException(status_code=404, detail="Profile not found.")
     return profile
 
 
+@app.get("/profiles/{profile_id}", response_model=ProfileResponse)
+async def get_profile(profile_id: int, user: CurrentUser = Depends(require_user), db: AsyncSession = Depends(get_async_db)):
+    return await _get_user_profile(db, profile_id, user.id)
+
+
 @app.delete("/profiles/{profile_id}")
-def delete_profile(profile_id: int, request: Request, db: Session = Depends(get_db)):
-    user = require_user(request)
-    profile = db.query(Profile).filter(Profile.id == profile_id, Profile.user_id == user.id).first()
-    if not profile:
-        raise HTTPException(status_code=404, detail="Profile not found.")
-    db.delete(profile)
-    db.commit()
+async def delete_profile(profile_id: int, user: CurrentUser = Depends(require_user), db: AsyncSession = Depends(get_async_db)):
+    profile = await _get_user_profile(db, profile_id, user.id)
+    await db.delete(profile)
+    await db.commit()
+    versions.bump(user.id, versions.PROFILES, versions.POSTS)
     logger.info(f"Deleted profile: {profile.name} for user {user.display_name}")
     return {"message": f"Profile '{profile.name}' deleted."}
 
 
-@app.get("/profiles/{profile_id}/posts", response_model=list[PostResponse])
-def get_profile_posts(profile_id: int, request: Request, db: Session = Depends(get_db)):
-    user = require_user(request)
-    profile = db.query(Profile).filter(Profile.id == profile_id, Profile.user_id == user.id).first()
-    if not profile:
-        raise HTTPException(status_code=404, detail="Profile not found.")
+@app.get("/profiles/{profile_id}/posts", response_model=list[PostSummaryResponse])
+async def get_profile_posts(profile_id: int, user: CurrentUser = Depends(require_user), db: AsyncSession = Depends(get_async_db)):
+    await _get_user_profile(db, profile_id, user.id)
     cutoff = datetime.utcnow() - timedelta(hours=24)
-    return db.query(Post).filter(
+    result = await db.execute(select(*POST_SUMMARY_COLUMNS).where(
         Post.profile_id == profile_id,
-        or_(
-            Post.post_timestamp >= cutoff,
-            and_(Post.post_timestamp.is_(None), Post.created_at >= cutoff)
-        )
-    ).order_by(Post.created_at.desc()).all()
+        # Posts are stored after they are published, so the created_at bound
+        # implies nothing extra but lets Postgres prune to recent partitions.
+        Post.created_at >= cutoff,
+        or_(Post.post_timestamp >= cutoff, Post.post_timestamp.is_(None))
+    ).order_by(Post.created_at.desc()))
+    return result.all()
 
 
-@app.get("/posts", response_model=list[PostResponse])
-def list_all_posts(request: Request, limit: int = 50, db: Session = Depends(get_db)):
-    user = require_user(request)
-    user_profile_ids = [p.id for p in db.query(Profile).filter(Profile.user_id == user.id).all()]
-    if not user_profile_ids:
-        return []
+async def _fetch_recent_posts(db: AsyncSession, user_id: int, limit: int):
+    user_profile_ids = select(Profile.id).where(Profile.user_id == user_id)
     cutoff = datetime.utcnow() - timedelta(hours=24)
-    return db.query(Post).filter(
+    result = await db.execute(select(*POST_SUMMARY_COLUMNS).where(
         Post.profile_id.in_(user_profile_ids),
-        or_(
-            Post.post_timestamp >= cutoff,
-            and_(Post.post_timestamp.is_(None), Post.created_at >= cutoff)
+        # Posts are stored after they are published, so the created_at bound
+        # implies nothing extra but lets Postgres prune to recent partitions.
+        Post.created_at >= cutoff,
+        or_(Post.post_timestamp >= cutoff, Post.post_timestamp.is_(None))
+    ).order_by(Post.created_at.desc()).limit(limit))
+    return result.all()
+
+
+@app.get("/posts", response_model=list[PostSummaryResponse])
+async def list_all_posts(request: Request, response: Response, limit: int = 50, user: CurrentUser = Depends(require_user), db: AsyncSession = Depends(get_async_db)):
+    # The 24h window slides on its own, so the hour is part of the tag.
+    hour = datetime.utcnow().strftime("%Y%m%d%H")
+    not_modified = _conditional(request, response, versions.etag(user.id, versions.POSTS, limit, hour))
+    if not_modified:
+        return not_modified
+    return await _fetch_recent_posts(db, user.id, limit)
+
+
+@app.get("/posts/{post_id}", response_model=PostResponse)
+async def get_post(post_id: int, user: CurrentUser = Depends(require_user), db: AsyncSession = Depends(get_async_db)):
+    post = await db.scalar(
+        select(Post).join(Profile, Profile.id == Post.profile_id)
+        .where(Post.id == post_id, Profile.user_id == user.id)
+    )
+    if not post:
+        raise HTTPException(status_code=404, detail="Post not found.")
+    return post
+
+
+@app.post("/posts/{post_id}/reply")
+async def generate_post_reply(post_id: int, user: CurrentUser = Depends(require_user), db: AsyncSession = Depends(get_async_db)):
+    from app.ai import generate_reply_now, is_rate_limit_error, REPLY_RETRY_AFTER_SECONDS
+    post = (await db.execute(
+        select(
+            Post.id, Post.created_at, Post.post_text, Post.summary, Post.category,
+            Post.suggested_reply, Profile.name.label("profile_name"),
         )
-    ).order_by(Post.created_at.desc()).limit(limit).all()
+        .join(Profile, Profile.id == Post.profile_id)
+        .where(Post.id == post_id, Profile.user_id == user.id)
+    )).first()
+    if not post:
+        raise HTTPException(status_code=404, detail="Post not found.")
+    if post.suggested_reply:
+        suggested_replies_total.labels("cached").inc()
+        return {"post_id": post.id, "suggested_reply": post.suggested_reply, "cached": True}
+
+    try:
+        reply = await run_in_threadpool(generate_reply_now, post.post_text, post.profile_name, post.summary, post.category)
+    except Exception as e:
+        logger.error(f"Reply generation failed for post {post_id}: {e}")
+        if is_rate_limit_error(e):
+            raise HTTPException(
+                status_code=503,
+                detail="Reply suggestions are busy right now. Try again shortly.",
+                headers={"Retry-After": str(REPLY_RETRY_AFTER_SECONDS)},
+            )
+        reply = None
+    if not reply:
+        raise HTTPException(status_code=502, detail="Could not generate a reply right now. Try again shortly.")
+
+    # Concurrent requests for the same post both generate; the first write
+    # wins and both return it.
+    stored = await db.scalar(
+        update(Post)
+        .where(Post.id == post.id, Post.created_at == post.created_at, Post.suggested_reply.is_(None))
+        .values(suggested_reply=reply)
+        .returning(Post.suggested_reply)
+    )
+    if stored is None:
+        stored = await db.scalar(select(Post.suggested_reply).where(Post.id == post.id, Post.created_at == post.created_at))
+    await db.commit()
+    versions.bump(user.id, versions.POSTS)
+    suggested_replies_total.labels("generated").inc()
+    return {"post_id": post.id, "suggested_reply": stored, "cached": False}
+
+
+@app.get("/search")
+async def search(
+    q: str,
+    category: list[str] = Query(default=[]),
+    limit: int = Query(default=20, ge=1, le=100),
+    cursor: str | None = None,
+    user: CurrentUser = Depends(require_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    from app.search import search_posts
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="Search query must not be empty.")
+    try:
+        return await search_posts(db, user.id, q, categories=category, limit=limit, cursor=cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+
+@app.get("/analytics")
+async def analytics(
+    days: int = Query(default=30, ge=1, le=365),
+    profile_id: int | None = None,
+    user: CurrentUser = Depends(require_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    from app.analytics import get_analytics
+    return await get_analytics(db, user.id, days=days, profile_id=profile_id)
+
+
+def _export_response(stream, kind: str, fmt: str):
+    from app.export import EXPORT_FORMATS
+    filename = f"{kind}-{datetime.utcnow():%Y%m%d}.{fmt}"
+    return StreamingResponse(
+        stream,
+        media_type=EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"', "Cache-Control": "no-store"},
+    )
+
+
+@app.get("/export/posts")
+async def export_posts(
+    format: str = Query(default="csv", pattern="^(csv|ndjson)$"),
+    since: date | None = None,
+    until: date | None = None,
+    profile_id: int | None = None,
+    user: CurrentUser = Depends(require_user),
+):
+    from app.export import stream_posts
+    return _export_response(stream_posts(format, user.id, since, until, profile_id), "posts", format)
+
+
+@app.get("/export/notifications")
+async def export_notifications(
+    format: str = Query(default="csv", pattern="^(csv|ndjson)$"),
+    since: date | None = None,
+    until: date | None = None,
+    profile_id: int | None = None,
+    user: CurrentUser = Depends(require_user),
+):
+    from app.export import stream_notifications
+    return _export_response(stream_notifications(format, user.id, since, until, profile_id), "notifications", format)
 
 
 @app.post("/trigger-job")
-def trigger_daily_job(request: Request):
-    user = require_user(request)
+async def trigger_daily_job(request: Request, profile: bool = False, user: CurrentUser = Depends(require_user)):
+    if profile and not is_admin(request):
+        raise HTTPException(status_code=403, detail="Admin token required to profile a run")
     try:
-        run_daily_job(user_id=user.id)
+        from app.scheduler import run_daily_job
+        await run_in_threadpool(run_daily_job, user_id=user.id, profile=profile or None)
         return {"message": "Daily job triggered successfully."}
     except Exception as e:
         logger.error(f"Manual job trigger failed: {e}")
         raise HTTPException(status_code=500, detail=f"Job failed: {str(e)}")
 
 
+class ProfilingSettings(BaseModel):
+    request_sample_rate: float = Field(ge=0, le=1)
+    profile_jobs: bool
+
+
+class ProfileFileResponse(BaseModel):
+    name: str
+    kind: str
+    size_bytes: int
+    created_at: datetime
+
+
+@app.get("/admin/profiling", response_model=ProfilingSettings, dependencies=[Depends(require_admin)])
+async def get_profiling_settings():
+    return ProfilingSettings(
+        request_sample_rate=profiling.config.request_sample_rate,
+        profile_jobs=profiling.config.profile_jobs,
+    )
+
+
+@app.put("/admin/profiling", response_model=ProfilingSettings, dependencies=[Depends(require_admin)])
+async def update_profiling_settings(settings: ProfilingSettings):
+    profiling.config.request_sample_rate = settings.request_sample_rate
+    profiling.config.profile_jobs = settings.profile_jobs
+    logger.info(f"Profiling settings changed: {settings}")
+    return settings
+
+
+@app.get("/admin/profiles", response_model=list[ProfileFileResponse], dependencies=[Depends(require_admin)])
+async def list_profiling_results():
+    return await run_in_threadpool(profiling.list_profiles)
+
+
+@app.get("/admin/profiles/{name}", dependencies=[Depends(require_admin)])
+async def download_profiling_result(name: str):
+    path = profiling.profile_path(name)
+    if not path:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="text/plain; charset=utf-8", filename=name)
+
+
 class EmailSettingsRequest(BaseModel):
     notify_email: str = ""
     smtp_host: str = "smtp.gmail.com"
@@ -345,21 +672,24 @@ class EmailSettingsRequest(BaseModel):
     smtp_password: str = ""
 
 
-@app.get("/settings/email")
-def get_settings(request: Request):
-    user = require_user(request)
-    from app.notify import get_email_settings
-    settings = get_email_settings(user_id=user.id)
+async def _masked_email_settings(db: AsyncSession, user_id: int) -> dict:
+    from app.notify import get_email_settings_async
+    settings = await get_email_settings_async(db, user_id=user_id)
     if settings.get("smtp_password"):
         settings["smtp_password"] = "***configured***"
     return settings
 
 
+@app.get("/settings/email", response_model=EmailSettingsResponse)
+async def get_settings(user: CurrentUser = Depends(require_user), db: AsyncSession = Depends(get_async_db)):
+    return await _masked_email_settings(db, user.id)
+
+
 @app.post("/settings/email")
-def update_settings(data: EmailSettingsRequest, request: Request):
-    user = require_user(request)
+async def update_settings(data: EmailSettingsRequest, user: CurrentUser = Depends(require_user), db: AsyncSession = Depends(get_async_db)):
     from app.notify import save_email_settings
-    save_email_settings(
+    await save_email_settings(
+        db,
         user_id=user.id,
         notify_email=data.notify_email,
         smtp_host=data.smtp_host,
@@ -370,9 +700,31 @@ def update_settings(data: EmailSettingsRequest, request: Request):
     return {"message": "Email settings saved successfully."}
 
 
-@app.get("/settings/linkedin")
-def get_linkedin_settings(request: Request):
-    require_user(request)
+class SlackSettingsRequest(BaseModel):
+    webhook_url: str = ""
+
+
+async def _slack_settings(db: AsyncSession, user_id: int) -> dict:
+    from app.notify import get_slack_webhook_async
+    return {"slack_configured": bool(await get_slack_webhook_async(db, user_id))}
+
+
+@app.get("/settings/slack")
+async def get_slack_settings(user: CurrentUser = Depends(require_user), db: AsyncSession = Depends(get_async_db)):
+    return await _slack_settings(db, user.id)
+
+
+@app.post("/settings/slack")
+async def update_slack_settings(data: SlackSettingsRequest, user: CurrentUser = Depends(require_user), db: AsyncSession = Depends(get_async_db)):
+    from app.notify import save_slack_webhook
+    webhook_url = data.webhook_url.strip()
+    if webhook_url and not webhook_url.startswith("https://hooks.slack.com/"):
+        raise HTTPException(status_code=400, detail="Enter a Slack incoming webhook URL (https://hooks.slack.com/...).")
+    await save_slack_webhook(db, user.id, webhook_url)
+    return {"message": "Slack settings saved successfully." if webhook_url else "Slack notifications turned off."}
+
+
+def _linkedin_settings() -> dict:
     api_key = os.environ.get("RAPIDAPI_KEY", "")
     return {
         "linkedin_configured": bool(api_key),
@@ -380,42 +732,65 @@ def get_linkedin_settings(request: Request):
     }
 
 
-@app.get("/notifications")
-def list_notifications(request: Request, limit: int = 50):
-    user = require_user(request)
+@app.get("/settings/linkedin")
+async def get_linkedin_settings(user: CurrentUser = Depends(require_user)):
+    return _linkedin_settings()
+
+
+@app.get("/notifications", response_model=list[NotificationResponse])
+async def list_notifications(request: Request, response: Response, limit: int = 50, user: CurrentUser = Depends(require_user), db: AsyncSession = Depends(get_async_db)):
     from app.notify import get_notifications
-    notifs = get_notifications(limit, user_id=user.id)
-    return [
-        {
-            "id": n.id,
-            "title": n.title,
-            "body": n.body,
-            "type": n.type,
-            "is_read": n.is_read,
-            "created_at": n.created_at.isoformat() if n.created_at else None,
-        }
-        for n in notifs
-    ]
+    not_modified = _conditional(request, response, versions.etag(user.id, versions.NOTIFICATIONS, limit))
+    if not_modified:
+        return not_modified
+    return await get_notifications(db, limit, user_id=user.id)
 
 
 @app.get("/notifications/unread-count")
-def unread_count(request: Request):
-    user = require_user(request)
+async def unread_count(user: CurrentUser = Depends(require_user), db: AsyncSession = Depends(get_async_db)):
     from app.notify import get_unread_count
-    return {"count": get_unread_count(user_id=user.id)}
+    return {"count": await get_unread_count(db, user_id=user.id)}
+
+
+@app.get("/notifications/stream")
+async def notification_stream(request: Request, user: CurrentUser = Depends(require_user), db: AsyncSession = Depends(get_async_db)):
+    from app.notify import get_unread_count
+    count = await get_unread_count(db, user_id=user.id)
+    # Hand the connection back to the pool; the stream itself stays open.
+    await db.close()
+
+    async def events():
+        queue = broker.subscribe(user.id)
+        try:
+            yield format_sse("unread-count", {"count": count})
+            while not await request.is_disconnected():
+                try:
+                    event, data = await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield format_sse(event, data)
+        finally:
+            broker.unsubscribe(user.id, queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @app.post("/notifications/mark-read/{notif_id}")
-def mark_read(notif_id: int, request: Request):
-    user = require_user(request)
+async def mark_read(notif_id: int, user: CurrentUser = Depends(require_user), db: AsyncSession = Depends(get_async_db)):
     from app.notify import mark_notification_read
-    mark_notification_read(notif_id, user_id=user.id)
+    await mark_notification_read(db, notif_id, user_id=user.id)
+    versions.bump(user.id, versions.NOTIFICATIONS)
     return {"message": "Marked as read."}
 
 
 @app.post("/notifications/mark-all-read")
-def mark_all_notifications_read(request: Request):
-    user = require_user(request)
+async def mark_all_notifications_read(user: CurrentUser = Depends(require_user), db: AsyncSession = Depends(get_async_db)):
     from app.notify import mark_all_read
-    mark_all_read(user_id=user.id)
+    await mark_all_read(db, user_id=user.id)
+    versions.bump(user.id, versions.NOTIFICATIONS)
     return {"message": "All notifications marked as read."}
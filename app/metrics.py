@@ -0,0 +1,141 @@
+import time
+from contextlib import contextmanager
+from prometheus_client import Counter, Gauge, Histogram, CONTENT_TYPE_LATEST, generate_latest
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import Response
+
+# Pipeline stages, each labeled with the upstream it waits on.
+URN_LOOKUP = "urn_lookup"
+POSTS_FETCH = "posts_fetch"
+DEDUP = "dedup"
+AI_ANALYSIS = "ai_analysis"
+AI_REPLY = "ai_reply"
+DB_WRITE = "db_write"
+NOTIFY = "notify"
+
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+stage_total = Counter(
+    "ingest_stage_total", "Ingest pipeline stage runs.", ["stage", "upstream", "outcome"],
+)
+stage_seconds = Histogram(
+    "ingest_stage_seconds", "Ingest pipeline stage latency.", ["stage", "upstream", "outcome"],
+    buckets=STAGE_BUCKETS,
+)
+job_seconds = Histogram(
+    "ingest_job_seconds", "Daily job duration per user.", ["outcome"],
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600),
+)
+http_requests_total = Counter(
+    "http_requests_total", "HTTP requests handled.", ["method", "route", "status"],
+)
+http_request_seconds = Histogram(
+    "http_request_seconds", "HTTP request latency, until response headers are sent.", ["method", "route"],
+)
+
+db_pool_checkout_seconds = Histogram(
+    "db_pool_checkout_seconds", "Time to get a pooled database connection.", ["engine"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30),
+)
+db_pool_timeouts_total = Counter(
+    "db_pool_timeouts_total", "Checkouts that gave up waiting for a pooled connection.", ["engine"],
+)
+db_pool_size = Gauge("db_pool_size", "Configured pool size.", ["engine"])
+db_pool_checked_out = Gauge("db_pool_checked_out", "Connections currently checked out.", ["engine"])
+db_pool_overflow = Gauge("db_pool_overflow", "Connections open beyond the pool size.", ["engine"])
+db_slow_queries_total = Counter(
+    "db_slow_queries_total", "Statements slower than SLOW_QUERY_MS, by call site.", ["engine", "call_site"],
+)
+preclassifier_decisions_total = Counter(
+    "preclassifier_decisions_total",
+    "Posts routed by the local pre-classifier (local, llm, or audit: decidable but sent to the LLM).",
+    ["route", "category"],
+)
+preclassifier_agreement_total = Counter(
+    "preclassifier_agreement_total",
+    "Local prediction vs LLM category for LLM-analyzed posts, by route (audit or llm).",
+    ["route", "local", "llm"],
+)
+
+# Per-call OpenAI usage (call: analysis or reply). Latency is labeled by
+# prompt size so input size can be read against it; token counts come from
+# the API's usage field.
+PROMPT_SIZE_BUCKETS = (250, 500, 1000, 2000, 4000)
+ai_prompt_tokens = Histogram(
+    "ai_prompt_tokens", "Prompt tokens per OpenAI call.", ["call", "trimmed"],
+    buckets=PROMPT_SIZE_BUCKETS,
+)
+ai_completion_tokens = Histogram(
+    "ai_completion_tokens", "Completion tokens per OpenAI call.", ["call", "finish_reason"],
+    buckets=(32, 64, 128, 256, 384, 512),
+)
+ai_request_seconds = Histogram(
+    "ai_request_seconds", "OpenAI call latency by prompt size.", ["call", "prompt_tokens"],
+    buckets=STAGE_BUCKETS,
+)
+
+suggested_replies_total = Counter(
+    "suggested_replies_total",
+    "Suggested replies served, by source (prefetch, generated on request, or cached).", ["source"],
+)
+
+
+def prompt_size_label(tokens: int) -> str:
+    for bound in PROMPT_SIZE_BUCKETS:
+        if tokens <= bound:
+            return f"le_{bound}"
+    return f"gt_{PROMPT_SIZE_BUCKETS[-1]}"
+
+
+# Extra sinks for raw stage timings, called as (stage, upstream, outcome,
+# seconds). Prometheus only keeps bucket counts; the benchmark harness
+# registers here to compute exact percentiles.
+stage_observers: list = []
+
+
+class _Stage:
+    __slots__ = ("outcome",)
+
+    def __init__(self):
+        self.outcome = "ok"
+
+
+@contextmanager
+def track(stage: str, upstream: str):
+    # The caller may set .outcome to something more specific than ok
+    # (e.g. "duplicate", "rate_limited"); an exception that escapes with
+    # the outcome still ok records "error".
+    result = _Stage()
+    started = time.perf_counter()
+    try:
+        yield result
+    except BaseException:
+        if result.outcome == "ok":
+            result.outcome = "error"
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        stage_total.labels(stage, upstream, result.outcome).inc()
+        stage_seconds.labels(stage, upstream, result.outcome).observe(elapsed)
+        for observe in stage_observers:
+            observe(stage, upstream, result.outcome, elapsed)
+
+
+class MetricsMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        started = time.perf_counter()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            # Label by route template, not raw path, to keep cardinality bounded.
+            route = request.scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            http_requests_total.labels(request.method, path, str(status)).inc()
+            http_request_seconds.labels(request.method, path).observe(time.perf_counter() - started)
+
+
+def metrics_response() -> Response:
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,97 @@
+import logging
+from sqlalchemy import text
+from app import database
+from app.models import Base
+
+logger = logging.getLogger(__name__)
+
+# Schema changes run here, once per database, instead of on every app
+# start. Apply them before deploying new code:
+#
+#     python -m app.migrations
+#
+# Each entry runs once and is recorded in schema_migrations. Append new
+# entries; never edit or reorder applied ones.
+
+# Arbitrary constant for pg_advisory_lock so concurrent deploys serialize.
+MIGRATION_LOCK_ID = 7421903
+
+
+def _baseline():
+    # Everything init_db() used to do on startup. Each step is idempotent,
+    # so databases created before migrations existed pick this up safely.
+    from app.partitions import prepare_posts_storage
+    from app.search import prepare_search_index
+    from app.analytics import backfill_rollups
+    Base.metadata.create_all(bind=database.engine)
+    prepare_posts_storage()
+    prepare_search_index()
+    backfill_rollups()
+
+
+def _post_category_source():
+    # Posts only: archived posts are not used for pre-classifier training.
+    with database.engine.begin() as conn:
+        conn.execute(text("ALTER TABLE posts ADD COLUMN IF NOT EXISTS category_source VARCHAR(10)"))
+
+
+def _post_fingerprints():
+    from app.neardup import prepare_fingerprints
+    prepare_fingerprints()
+
+
+def _archive_search_vector():
+    # Search covers archived posts; see app/search.py.
+    from app.search import prepare_search_index
+    prepare_search_index()
+
+
+MIGRATIONS = [
+    ("0001_baseline", _baseline),
+    ("0002_post_category_source", _post_category_source),
+    ("0003_post_fingerprints", _post_fingerprints),
+    ("0004_archive_search_vector", _archive_search_vector),
+]
+
+
+def _applied(conn) -> set[str]:
+    if conn.execute(text("SELECT to_regclass('schema_migrations')")).scalar() is None:
+        return set()
+    return set(conn.execute(text("SELECT version FROM schema_migrations")).scalars())
+
+
+def pending_migrations() -> list[str]:
+    with database.engine.connect() as conn:
+        applied = _applied(conn)
+    return [version for version, _ in MIGRATIONS if version not in applied]
+
+
+def migrate() -> list[str]:
+    ran = []
+    with database.engine.connect() as lock_conn:
+        lock_conn.execute(text("SELECT pg_advisory_lock(:id)"), {"id": MIGRATION_LOCK_ID})
+        try:
+            with database.engine.begin() as conn:
+                conn.execute(text(
+                    "CREATE TABLE IF NOT EXISTS schema_migrations ("
+                    "version VARCHAR(100) PRIMARY KEY, applied_at TIMESTAMP NOT NULL DEFAULT (now() AT TIME ZONE 'utc'))"
+                ))
+                applied = _applied(conn)
+            for version, step in MIGRATIONS:
+                if version in applied:
+                    continue
+                logger.info(f"Applying migration {version}...")
+                step()
+                with database.engine.begin() as conn:
+                    conn.execute(text("INSERT INTO schema_migrations (version) VALUES (:v)"), {"v": version})
+                ran.append(version)
+        finally:
+            lock_conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": MIGRATION_LOCK_ID})
+            lock_conn.commit()
+    logger.info(f"Applied {len(ran)} migration(s)." if ran else "Database schema is up to date.")
+    return ran
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    migrate()
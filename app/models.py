@@ -1,5 +1,6 @@
 import datetime
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Date, Text, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import relationship, declarative_base
 
 Base = declarative_base()
@@ -35,6 +36,12 @@ class Profile(Base):
 
 class Post(Base):
     __tablename__ = "posts"
+    # Range-partitioned by day on created_at (see app/partitions.py); the
+    # partition key has to be part of the primary key.
+    __table_args__ = (
+        Index("ix_posts_search_vector", "search_vector", postgresql_using="gin"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     profile_id = Column(Integer, ForeignKey("profiles.id"), nullable=False)
@@ -45,11 +52,66 @@ class Post(Base):
     summary = Column(Text, nullable=True)
     category = Column(String(50), nullable=True)
     suggested_reply = Column(Text, nullable=True)
-    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    # "llm" or "local" (app/preclassifier.py); NULL for posts analyzed
+    # before the pre-classifier existed, which were all LLM-labeled.
+    category_source = Column(String(10), nullable=True)
+    search_vector = Column(TSVECTOR, nullable=True)
+    # SimHash of the text, band-indexed by expression (app/neardup.py).
+    simhash = Column(BigInteger, nullable=True)
+    # Set on near-duplicates, which reuse the original's analysis. No FK,
+    # for the same reason as NotificationPost.post_id.
+    duplicate_of_id = Column(Integer, nullable=True)
+    created_at = Column(DateTime, primary_key=True, default=datetime.datetime.utcnow)
 
     profile = relationship("Profile", back_populates="posts")
 
 
+class PostArchive(Base):
+    __tablename__ = "posts_archive"
+    __table_args__ = (
+        Index("ix_posts_archive_search_vector", "search_vector", postgresql_using="gin"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    profile_id = Column(Integer, ForeignKey("profiles.id", ondelete="CASCADE"), nullable=False, index=True)
+    post_text = Column(Text, nullable=False)
+    post_url = Column(String(512), nullable=True)
+    post_hash = Column(String(64), nullable=True)
+    post_timestamp = Column(DateTime, nullable=True)
+    summary = Column(Text, nullable=True)
+    category = Column(String(50), nullable=True)
+    suggested_reply = Column(Text, nullable=True)
+    # Carried over from posts so search covers archived posts too.
+    search_vector = Column(TSVECTOR, nullable=True)
+    created_at = Column(DateTime, primary_key=True)
+    archived_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+
+class PostDailyRollup(Base):
+    __tablename__ = "post_daily_rollups"
+    __table_args__ = (
+        UniqueConstraint("profile_id", "day", "category", name="uq_post_daily_rollups_profile_day_category"),
+        Index("ix_post_daily_rollups_user_day", "user_id", "day"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=True)
+    profile_id = Column(Integer, ForeignKey("profiles.id", ondelete="CASCADE"), nullable=False)
+    day = Column(Date, nullable=False)
+    category = Column(String(50), nullable=False)
+    post_count = Column(Integer, nullable=False, default=0)
+
+
+class ProfileActivity(Base):
+    __tablename__ = "profile_activity"
+
+    profile_id = Column(Integer, ForeignKey("profiles.id", ondelete="CASCADE"), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=True, index=True)
+    post_count = Column(Integer, nullable=False, default=0)
+    first_post_at = Column(DateTime, nullable=True)
+    last_post_at = Column(DateTime, nullable=True)
+
+
 class Notification(Base):
     __tablename__ = "notifications"
 
@@ -62,6 +124,47 @@ class Notification(Base):
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
 
     user = relationship("User", back_populates="notifications")
+    posts = relationship(
+        "NotificationPost", back_populates="notification",
+        cascade="all, delete-orphan", order_by="NotificationPost.position",
+    )
+
+
+class NotificationPost(Base):
+    # Links a digest notification to the posts it covers. post_id carries no
+    # FK: posts is partitioned on (id, created_at) and old partitions get
+    # archived, so a digest may outlive the rows it points at.
+    __tablename__ = "notification_posts"
+
+    notification_id = Column(Integer, ForeignKey("notifications.id", ondelete="CASCADE"), primary_key=True)
+    position = Column(Integer, primary_key=True)
+    post_id = Column(Integer, nullable=False)
+
+    notification = relationship("Notification", back_populates="posts")
+
+
+class OutboxMessage(Base):
+    # Outgoing deliveries written by the daily job and drained by the
+    # delivery worker (app/outbox.py), so slow providers never hold up ingestion.
+    __tablename__ = "outbox"
+    __table_args__ = (
+        Index("ix_outbox_status_next_attempt", "status", "next_attempt_at"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=True)
+    notification_id = Column(Integer, ForeignKey("notifications.id", ondelete="SET NULL"), nullable=True)
+    channel = Column(String(20), nullable=False, default="email")
+    recipient = Column(String(512), nullable=False)
+    subject = Column(String(512), nullable=True)
+    body = Column(Text, nullable=False)
+    html_body = Column(Text, nullable=True)
+    status = Column(String(20), nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.datetime.utcnow)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    sent_at = Column(DateTime, nullable=True)
 
 
 class Settings(Base):
@@ -0,0 +1,159 @@
+import os
+import re
+import logging
+import hashlib
+from collections import Counter
+from datetime import datetime, timedelta
+from sqlalchemy import select, or_, literal_column, text
+from app import database
+from app.models import Post
+
+logger = logging.getLogger(__name__)
+
+# 64-bit SimHash over the words of a post. Two posts whose fingerprints
+# differ in at most NEAR_DUP_MAX_DISTANCE bits are near-duplicate
+# candidates. The fingerprint is split into BANDS 4-bit bands, each with a
+# (profile_id, band) expression index on posts; by pigeonhole, fingerprints
+# within BANDS - 1 bits share at least one band exactly, so candidates come
+# from index lookups rather than a scan of the user's posts.
+#
+# Narrow bands trade selectivity for recall: a two-word edit of a short
+# post, or a reworded repost, moves the fingerprint 8-13 bits. Candidates
+# are cheap (id and fingerprint only) and the containment check below keeps
+# false positives out.
+BANDS = 16
+BAND_BITS = 64 // BANDS
+BAND_MASK = (1 << BAND_BITS) - 1
+
+NEAR_DUP_MAX_DISTANCE = min(int(os.environ.get("NEAR_DUP_MAX_DISTANCE", str(BANDS - 1))), BANDS - 1)
+NEAR_DUP_WINDOW_DAYS = int(os.environ.get("NEAR_DUP_WINDOW_DAYS", "30"))
+# Candidates are confirmed on word bigrams; containment rather than Jaccard
+# so a repost with an added intro line still matches.
+NEAR_DUP_MIN_CONTAINMENT = float(os.environ.get("NEAR_DUP_MIN_CONTAINMENT", "0.8"))
+# Fingerprints of very short posts collide too easily; those rely on the
+# exact post_hash only.
+MIN_WORDS = 12
+
+URL_RE = re.compile(r"https?://\S+|www\.\S+", re.I)
+WORD_RE = re.compile(r"[^\W_]+")
+RESHARE_PREFIX_RE = re.compile(r"^\s*(?:reposted|shared|resharing)(?: from [^:\n]+)?\s*[:\-]?\s*", re.I)
+
+
+def _words(post_text: str) -> list[str]:
+    # Case, punctuation, links and reshare prefixes are the usual
+    # differences between copies of the same post, so none of them count.
+    return WORD_RE.findall(RESHARE_PREFIX_RE.sub("", URL_RE.sub(" ", post_text)).lower())
+
+
+def shingles(post_text: str) -> set[str]:
+    words = _words(post_text)
+    return {f"{a} {b}" for a, b in zip(words, words[1:])}
+
+
+def simhash(post_text: str) -> int | None:
+    weights = Counter(_words(post_text))
+    if len(weights) < MIN_WORDS:
+        return None
+    counts = [0] * 64
+    for word, weight in weights.items():
+        h = int.from_bytes(hashlib.blake2b(word.encode(), digest_size=8).digest(), "big")
+        for bit in range(64):
+            counts[bit] += weight if h >> bit & 1 else -weight
+    fingerprint = 0
+    for bit, count in enumerate(counts):
+        if count > 0:
+            fingerprint |= 1 << bit
+    # Stored in a signed BIGINT.
+    return fingerprint - (1 << 64) if fingerprint >= 1 << 63 else fingerprint
+
+
+def bands(fingerprint: int) -> list[int]:
+    return [(fingerprint >> (band * BAND_BITS)) & BAND_MASK for band in range(BANDS)]
+
+
+def hamming(a: int, b: int) -> int:
+    return ((a ^ b) & ((1 << 64) - 1)).bit_count()
+
+
+def band_expr(band: int):
+    # Rendered with literals so it matches the band expression indexes;
+    # bound parameters would not.
+    return Post.simhash.op(">>")(literal_column(str(band * BAND_BITS))).op("&")(literal_column(str(BAND_MASK)))
+
+
+def band_index_ddl(band: int) -> str:
+    return (
+        f"CREATE INDEX IF NOT EXISTS ix_posts_simhash_band{band} "
+        f"ON posts (profile_id, ((simhash >> {band * BAND_BITS}) & {BAND_MASK}))"
+    )
+
+
+def containment(a: set[str], b: set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / min(len(a), len(b))
+
+
+def find_near_duplicate(db, profile_ids: list[int], post_text: str, fingerprint: int | None) -> Post | None:
+    # Looks across all of a user's tracked profiles, so a company page
+    # cross-posting a founder's post is caught too. Returns the original.
+    if fingerprint is None or not profile_ids:
+        return None
+    since = datetime.utcnow() - timedelta(days=NEAR_DUP_WINDOW_DAYS)
+    candidates = db.execute(
+        select(Post.id, Post.simhash)
+        .where(
+            Post.profile_id.in_(profile_ids),
+            Post.created_at >= since,
+            or_(*(band_expr(band) == value for band, value in enumerate(bands(fingerprint)))),
+        )
+        .order_by(Post.created_at)
+    ).all()
+    close = [c.id for c in candidates if hamming(c.simhash, fingerprint) <= NEAR_DUP_MAX_DISTANCE]
+    if not close:
+        return None
+    found = shingles(post_text)
+    rows = db.execute(
+        select(Post.id, Post.post_text, Post.duplicate_of_id)
+        .where(Post.id.in_(close), Post.created_at >= since)
+        .order_by(Post.created_at)
+    ).all()
+    for row in rows:
+        if containment(shingles(row.post_text), found) >= NEAR_DUP_MIN_CONTAINMENT:
+            original_id = row.duplicate_of_id or row.id
+            return db.execute(select(Post).where(Post.id == original_id)).scalars().first()
+    return None
+
+
+def prepare_fingerprints(batch_size: int = 1000):
+    # Columns, band indexes and fingerprints for posts inside the lookup
+    # window; older posts are never candidates.
+    with database.engine.begin() as conn:
+        conn.execute(text("ALTER TABLE posts ADD COLUMN IF NOT EXISTS simhash BIGINT"))
+        conn.execute(text("ALTER TABLE posts ADD COLUMN IF NOT EXISTS duplicate_of_id INTEGER"))
+        for band in range(BANDS):
+            conn.execute(text(band_index_ddl(band)))
+    since = datetime.utcnow() - timedelta(days=NEAR_DUP_WINDOW_DAYS)
+    backfilled = 0
+    last_id = 0
+    while True:
+        with database.engine.begin() as conn:
+            rows = conn.execute(text(
+                "SELECT id, created_at, post_text FROM posts "
+                "WHERE simhash IS NULL AND created_at >= :since AND id > :last_id ORDER BY id LIMIT :n"
+            ), {"since": since, "last_id": last_id, "n": batch_size}).all()
+            if not rows:
+                break
+            updates = []
+            for r in rows:
+                fingerprint = simhash(r.post_text)
+                if fingerprint is not None:
+                    updates.append({"id": r.id, "created_at": r.created_at, "simhash": fingerprint})
+            if updates:
+                conn.execute(text(
+                    "UPDATE posts SET simhash = :simhash WHERE id = :id AND created_at = :created_at"
+                ), updates)
+            backfilled += len(updates)
+            last_id = rows[-1].id
+    if backfilled:
+        logger.info(f"Backfilled near-duplicate fingerprints for {backfilled} post(s).")
@@ -1,254 +1,267 @@
 import logging
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from app.database import SessionLocal
-from app.models import Settings, Notification
+from sqlalchemy import select, update, func, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import Settings, Notification, NotificationPost, Post, PostArchive, Profile
+from app import database, versions
+from app.events import broker
+from app.outbox import enqueue_email, enqueue_slack
+from app.slack import build_digest_payloads
+from app.digest import render_email_digest
 
 logger = logging.getLogger(__name__)
 
 
-def _get_setting(db, key: str, default: str = "", user_id: int = None) -> str:
-    q = db.query(Settings).filter(Settings.key == key)
+EMAIL_SETTING_DEFAULTS = {
+    "notify_email": "",
+    "smtp_host": "smtp.gmail.com",
+    "smtp_port": "587",
+    "smtp_user": "",
+    "smtp_password": "",
+}
+
+SLACK_WEBHOOK_KEY = "slack_webhook_url"
+
+
+def _email_settings_query(user_id: int = None):
+    q = select(Settings.key, Settings.value).where(Settings.key.in_(EMAIL_SETTING_DEFAULTS.keys()))
     if user_id is not None:
-        q = q.filter(Settings.user_id == user_id)
-    row = q.first()
-    return row.value if row and row.value else default
+        q = q.where(Settings.user_id == user_id)
+    return q.order_by(Settings.id)
+
+
+def _email_settings_from_rows(rows) -> dict:
+    settings = dict(EMAIL_SETTING_DEFAULTS)
+    seen = set()
+    for key, value in rows:
+        if key in seen:
+            continue
+        seen.add(key)
+        if value:
+            settings[key] = value
+    return settings
 
 
 def get_email_settings(user_id: int = None) -> dict:
-    db = SessionLocal()
+    db = database.SessionLocal()
     try:
-        return {
-            "notify_email": _get_setting(db, "notify_email", user_id=user_id),
-            "smtp_host": _get_setting(db, "smtp_host", "smtp.gmail.com", user_id=user_id),
-            "smtp_port": _get_setting(db, "smtp_port", "587", user_id=user_id),
-            "smtp_user": _get_setting(db, "smtp_user", user_id=user_id),
-            "smtp_password": _get_setting(db, "smtp_password", user_id=user_id),
-        }
+        return _email_settings_from_rows(db.execute(_email_settings_query(user_id)).all())
     finally:
         db.close()
 
 
-def save_email_settings(user_id: int, notify_email: str, smtp_host: str, smtp_port: str, smtp_user: str, smtp_password: str):
-    db = SessionLocal()
+async def get_email_settings_async(db: AsyncSession, user_id: int = None) -> dict:
+    result = await db.execute(_email_settings_query(user_id))
+    return _email_settings_from_rows(result.all())
+
+
+def get_slack_webhook(user_id: int = None) -> str:
+    db = database.SessionLocal()
     try:
-        settings = {
-            "notify_email": notify_email,
-            "smtp_host": smtp_host,
-            "smtp_port": smtp_port,
-            "smtp_user": smtp_user,
-        }
-        if smtp_password:
-            settings["smtp_password"] = smtp_password
-        for key, value in settings.items():
-            row = db.query(Settings).filter(Settings.key == key, Settings.user_id == user_id).first()
-            if row:
-                row.value = value
-            else:
-                db.add(Settings(key=key, value=value, user_id=user_id))
-        db.commit()
-        logger.info(f"Email settings saved for user {user_id}.")
+        q = select(Settings.value).where(Settings.key == SLACK_WEBHOOK_KEY)
+        if user_id is not None:
+            q = q.where(Settings.user_id == user_id)
+        return db.execute(q.order_by(Settings.id)).scalars().first() or ""
     finally:
         db.close()
 
 
-def save_notification(title: str, body: str, notif_type: str = "digest", user_id: int = None):
-    db = SessionLocal()
+async def get_slack_webhook_async(db: AsyncSession, user_id: int) -> str:
+    result = await db.execute(
+        select(Settings.value)
+        .where(Settings.key == SLACK_WEBHOOK_KEY, Settings.user_id == user_id)
+        .order_by(Settings.id)
+    )
+    return result.scalars().first() or ""
+
+
+async def save_slack_webhook(db: AsyncSession, user_id: int, webhook_url: str):
+    row = await db.scalar(
+        select(Settings).where(Settings.key == SLACK_WEBHOOK_KEY, Settings.user_id == user_id).order_by(Settings.id)
+    )
+    if row:
+        row.value = webhook_url
+    else:
+        db.add(Settings(key=SLACK_WEBHOOK_KEY, value=webhook_url, user_id=user_id))
+    await db.commit()
+    logger.info(f"Slack settings saved for user {user_id}.")
+
+
+async def save_email_settings(db: AsyncSession, user_id: int, notify_email: str, smtp_host: str, smtp_port: str, smtp_user: str, smtp_password: str):
+    settings = {
+        "notify_email": notify_email,
+        "smtp_host": smtp_host,
+        "smtp_port": smtp_port,
+        "smtp_user": smtp_user,
+    }
+    if smtp_password:
+        settings["smtp_password"] = smtp_password
+    result = await db.execute(
+        select(Settings).where(Settings.key.in_(settings.keys()), Settings.user_id == user_id)
+    )
+    rows = {row.key: row for row in result.scalars()}
+    for key, value in settings.items():
+        row = rows.get(key)
+        if row:
+            row.value = value
+        else:
+            db.add(Settings(key=key, value=value, user_id=user_id))
+    await db.commit()
+    logger.info(f"Email settings saved for user {user_id}.")
+
+
+def save_notification(title: str, body: str, notif_type: str = "digest", user_id: int = None,
+                      post_ids: list[int] | None = None):
+    db = database.SessionLocal()
     try:
         notif = Notification(title=title, body=body, type=notif_type, user_id=user_id)
+        notif.posts = [NotificationPost(position=i, post_id=post_id) for i, post_id in enumerate(post_ids or [])]
         db.add(notif)
         db.commit()
+        notif_id = notif.id
+        versions.bump(user_id, versions.NOTIFICATIONS)
+        if user_id is not None and broker.subscriber_count(user_id):
+            unread = db.execute(_unread_count_query(user_id)).scalar_one()
+            broker.publish(user_id, "notification", {"id": notif_id, "title": title})
+            broker.publish(user_id, "unread-count", {"count": unread})
         logger.info(f"Notification saved: {title} (user_id={user_id})")
+        return notif_id
     finally:
         db.close()
 
 
-def get_notifications(limit: int = 50, user_id: int = None):
-    db = SessionLocal()
-    try:
-        q = db.query(Notification)
-        if user_id is not None:
-            q = q.filter(Notification.user_id == user_id)
-        return q.order_by(Notification.created_at.desc()).limit(limit).all()
-    finally:
-        db.close()
+async def get_notifications(db: AsyncSession, limit: int = 50, user_id: int = None):
+    q = select(Notification)
+    if user_id is not None:
+        q = q.where(Notification.user_id == user_id)
+    result = await db.execute(q.order_by(Notification.created_at.desc()).limit(limit))
+    notifs = result.scalars().all()
+    entries = await get_digest_entries(db, [n.id for n in notifs])
+    return [
+        {
+            "id": n.id,
+            "title": n.title,
+            "body": n.body,
+            "type": n.type,
+            "is_read": n.is_read,
+            "created_at": n.created_at,
+            "entries": entries.get(n.id, []),
+        }
+        for n in notifs
+    ]
+
+
+async def get_digest_entries(db: AsyncSession, notification_ids: list[int]) -> dict[int, list[dict]]:
+    # Digests outlive their posts' partitions, so links resolve against
+    # archived posts too; a post that is gone entirely still gets an entry.
+    if not notification_ids:
+        return {}
+    posts = union_all(*(
+        select(model.id, model.profile_id, model.category, model.summary, model.post_url)
+        for model in (Post, PostArchive)
+    )).subquery()
+    result = await db.execute(
+        select(
+            NotificationPost.notification_id, NotificationPost.post_id, Profile.name, posts.c.id.label("found"),
+            posts.c.category, posts.c.summary, posts.c.post_url,
+        )
+        .outerjoin(posts, posts.c.id == NotificationPost.post_id)
+        .outerjoin(Profile, Profile.id == posts.c.profile_id)
+        .where(NotificationPost.notification_id.in_(notification_ids))
+        .order_by(NotificationPost.notification_id, NotificationPost.position)
+    )
+    entries = {}
+    for row in result:
+        entries.setdefault(row.notification_id, []).append({
+            "post_id": row.post_id,
+            "name": row.name or "Unknown",
+            "category": row.category,
+            "summary": row.summary if row.found is not None else "This post is no longer available.",
+            "post_url": row.post_url,
+        })
+    return entries
+
+
+async def _publish_unread_count(db: AsyncSession, user_id: int | None):
+    if user_id is None or not broker.subscriber_count(user_id):
+        return
+    broker.publish(user_id, "unread-count", {"count": await get_unread_count(db, user_id=user_id)})
+
+
+async def mark_notification_read(db: AsyncSession, notif_id: int, user_id: int = None):
+    q = update(Notification).where(Notification.id == notif_id)
+    if user_id is not None:
+        q = q.where(Notification.user_id == user_id)
+    await db.execute(q.values(is_read=1))
+    await db.commit()
+    await _publish_unread_count(db, user_id)
 
 
-def mark_notification_read(notif_id: int, user_id: int = None):
-    db = SessionLocal()
-    try:
-        q = db.query(Notification).filter(Notification.id == notif_id)
-        if user_id is not None:
-            q = q.filter(Notification.user_id == user_id)
-        notif = q.first()
-        if notif:
-            notif.is_read = 1
-            db.commit()
-    finally:
-        db.close()
+async def mark_all_read(db: AsyncSession, user_id: int = None):
+    q = update(Notification).where(Notification.is_read == 0)
+    if user_id is not None:
+        q = q.where(Notification.user_id == user_id)
+    await db.execute(q.values(is_read=1))
+    await db.commit()
+    await _publish_unread_count(db, user_id)
 
 
-def mark_all_read(user_id: int = None):
-    db = SessionLocal()
-    try:
-        q = db.query(Notification).filter(Notification.is_read == 0)
-        if user_id is not None:
-            q = q.filter(Notification.user_id == user_id)
-        q.update({"is_read": 1})
-        db.commit()
-    finally:
-        db.close()
+def _unread_count_query(user_id: int = None):
+    q = select(func.count(Notification.id)).where(Notification.is_read == 0)
+    if user_id is not None:
+        q = q.where(Notification.user_id == user_id)
+    return q
 
 
-def get_unread_count(user_id: int = None) -> int:
-    db = SessionLocal()
-    try:
-        q = db.query(Notification).filter(Notification.is_read == 0)
-        if user_id is not None:
-            q = q.filter(Notification.user_id == user_id)
-        return q.count()
-    finally:
-        db.close()
+async def get_unread_count(db: AsyncSession, user_id: int = None) -> int:
+    result = await db.execute(_unread_count_query(user_id))
+    return result.scalar_one()
 
 
 def send_digest(entries: list[dict], profile_names: list[str] | None = None, user_id: int = None) -> bool:
     if entries:
+        # The entries themselves live in posts; the digest only links to them.
         title = f"Daily Update - {len(entries)} new post(s)"
-        body_parts = []
-        for e in entries:
-            line = f"{e.get('name', 'Unknown')} [{e.get('category', 'Other')}]: {e.get('summary', 'N/A')}"
-            post_url = e.get('post_url', '')
-            if post_url:
-                line += f"\n{post_url}"
-            body_parts.append(line)
-        body = "\n\n".join(body_parts)
+        names = list(dict.fromkeys(e.get("name", "Unknown") for e in entries))
+        body = f"New posts from {', '.join(names)}."
+        post_ids = [e["post_id"] for e in entries if e.get("post_id")]
     else:
         names = ", ".join(profile_names) if profile_names else "your tracked profiles"
         title = "Daily Update - No new posts today"
         body = f"No new posts were found from {names}. We'll check again tomorrow!"
+        post_ids = []
 
-    save_notification(title, body, user_id=user_id)
+    notif_id = save_notification(title, body, user_id=user_id, post_ids=post_ids)
 
-    settings = get_email_settings(user_id=user_id)
-    notify_email = settings["notify_email"]
-    smtp_host = settings["smtp_host"]
-    smtp_port = int(settings["smtp_port"])
-    smtp_user = settings["smtp_user"]
-    smtp_password = settings["smtp_password"]
-
-    if not notify_email or not smtp_user or not smtp_password:
-        logger.info("Email not fully configured. Notification saved to dashboard only.")
-        return True
+    # Delivery happens on the outbox worker, so a slow or failing SMTP
+    # server or webhook never holds up the job that produced the digest.
+    channels = []
+    db = database.SessionLocal()
+    try:
+        if _queue_email_digest(db, entries, profile_names, user_id, notif_id):
+            channels.append("email")
+        webhook_url = get_slack_webhook(user_id)
+        if webhook_url and entries:
+            enqueue_slack(db, user_id, notif_id, build_digest_payloads(entries))
+            channels.append("slack")
+        db.commit()
+    finally:
+        db.close()
 
-    if entries:
-        html_body = _build_html(entries)
-        plain_body = _build_plain_text(entries)
-        subject = f"Daily Relationship Update - {len(entries)} new post(s)"
+    if channels:
+        logger.info(f"Digest with {len(entries)} entries queued for {', '.join(channels)} (user_id={user_id}).")
     else:
-        names = ", ".join(profile_names) if profile_names else "your tracked profiles"
-        subject = "Daily Relationship Update - No new posts today"
-        plain_body = f"No new posts were found today from {names}.\nWe'll check again tomorrow!"
-        html_body = f"""
-    <html>
-    <body style="font-family:-apple-system,BlinkMacSystemFont,'Segoe UI',Roboto,sans-serif; background:#f0f2f5; padding:20px;">
-        <div style="max-width:600px; margin:0 auto; background:white; border-radius:10px; overflow:hidden; box-shadow:0 2px 8px rgba(0,0,0,0.1);">
-            <div style="background:#0a66c2; color:white; padding:20px 24px;">
-                <h1 style="margin:0; font-size:20px;">Daily Relationship Update</h1>
-                <p style="margin:4px 0 0; opacity:0.9; font-size:14px;">No new posts today</p>
-            </div>
-            <div style="padding:32px 24px; text-align:center;">
-                <p style="font-size:16px; color:#333; margin:0 0 8px;">No new posts were found from {names}.</p>
-                <p style="font-size:14px; color:#888; margin:0;">We'll check again tomorrow!</p>
-            </div>
-            <div style="padding:16px 24px; text-align:center; color:#999; font-size:12px;">
-                LinkedIn Relationship Intelligence Tool
-            </div>
-        </div>
-    </body>
-    </html>"""
-
-    msg = MIMEMultipart("alternative")
-    msg["Subject"] = subject
-    msg["From"] = smtp_user
-    msg["To"] = notify_email
-
-    msg.attach(MIMEText(plain_body, "plain"))
-    msg.attach(MIMEText(html_body, "html"))
+        logger.info("No delivery channels configured. Notification saved to dashboard only.")
+    return True
 
-    try:
-        with smtplib.SMTP(smtp_host, smtp_port, timeout=30) as server:
-            server.ehlo()
-            server.starttls()
-            server.ehlo()
-            server.login(smtp_user, smtp_password)
-            server.sendmail(smtp_user, notify_email, msg.as_string())
-        logger.info(f"Email digest sent to {notify_email} with {len(entries)} entries.")
-        return True
-    except Exception as e:
-        logger.error(f"Failed to send email (notification still saved to dashboard): {e}")
-        return False
 
+def _queue_email_digest(db, entries: list[dict], profile_names: list[str] | None, user_id: int,
+                        notif_id: int) -> bool:
+    settings = get_email_settings(user_id=user_id)
+    notify_email = settings["notify_email"]
+    if not notify_email or not settings["smtp_user"] or not settings["smtp_password"]:
+        return False
 
-def _build_plain_text(entries: list[dict]) -> str:
-    lines = ["Daily Relationship Update", "=" * 30, ""]
-    for entry in entries:
-        lines.append(f"Name: {entry.get('name', 'Unknown')}")
-        lines.append(f"Category: {entry.get('category', 'Other')}")
-        lines.append(f"Summary: {entry.get('summary', 'N/A')}")
-        lines.append(f"Suggested Reply: {entry.get('suggested_reply', 'N/A')}")
-        lines.append(f"Post Link: {entry.get('post_url', 'N/A')}")
-        lines.append("-" * 30)
-        lines.append("")
-    return "\n".join(lines)
-
-
-def _build_html(entries: list[dict]) -> str:
-    category_colors = {
-        "Funding": "#2e7d32",
-        "Hiring": "#e65100",
-        "Launch": "#1565c0",
-        "Other": "#616161",
-    }
+    subject, plain_body, html_body = render_email_digest(entries, profile_names)
+    enqueue_email(db, user_id, notif_id, notify_email, subject, plain_body, html_body)
+    return True
 
-    rows = ""
-    for entry in entries:
-        name = entry.get("name", "Unknown")
-        category = entry.get("category", "Other")
-        summary = entry.get("summary", "N/A")
-        reply = entry.get("suggested_reply", "N/A")
-        post_url = entry.get("post_url", "")
-        color = category_colors.get(category, "#616161")
-
-        link_html = f'<a href="{post_url}" style="color:#0a66c2;">View Post</a>' if post_url else "N/A"
-
-        rows += f"""
-        <tr>
-            <td style="padding:16px; border-bottom:1px solid #eee;">
-                <div style="font-weight:600; font-size:15px; margin-bottom:6px;">{name}</div>
-                <div style="display:inline-block; background:{color}; color:white; padding:2px 10px; border-radius:12px; font-size:12px; font-weight:600; margin-bottom:8px;">{category}</div>
-                <div style="font-size:14px; color:#333; margin-bottom:8px;">{summary}</div>
-                <div style="background:#f8f9fa; border-left:3px solid #0a66c2; padding:8px 12px; font-size:13px; color:#555; margin-bottom:8px;">
-                    <strong style="color:#0a66c2; font-size:11px; text-transform:uppercase;">Suggested Reply</strong><br>{reply}
-                </div>
-                <div>{link_html}</div>
-            </td>
-        </tr>"""
-
-    return f"""
-    <html>
-    <body style="font-family:-apple-system,BlinkMacSystemFont,'Segoe UI',Roboto,sans-serif; background:#f0f2f5; padding:20px;">
-        <div style="max-width:600px; margin:0 auto; background:white; border-radius:10px; overflow:hidden; box-shadow:0 2px 8px rgba(0,0,0,0.1);">
-            <div style="background:#0a66c2; color:white; padding:20px 24px;">
-                <h1 style="margin:0; font-size:20px;">Daily Relationship Update</h1>
-                <p style="margin:4px 0 0; opacity:0.9; font-size:14px;">{len(entries)} new post(s) detected</p>
-            </div>
-            <table style="width:100%; border-collapse:collapse;">
-                {rows}
-            </table>
-            <div style="padding:16px 24px; text-align:center; color:#999; font-size:12px;">
-                LinkedIn Relationship Intelligence Tool
-            </div>
-        </div>
-    </body>
-    </html>"""
@@ -0,0 +1,228 @@
+import json
+import logging
+import os
+import random
+import smtplib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
+from sqlalchemy import select, update
+from app.models import OutboxMessage
+from app import database, metrics
+from app.mailer import smtp_pool
+from app.slack import slack_client, SlackWebhookRejected
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_BATCH_SIZE = int(os.environ.get("OUTBOX_BATCH_SIZE", "100"))
+OUTBOX_MAX_ATTEMPTS = int(os.environ.get("OUTBOX_MAX_ATTEMPTS", "6"))
+OUTBOX_RETRY_BASE_SECONDS = int(os.environ.get("OUTBOX_RETRY_BASE_SECONDS", "60"))
+OUTBOX_POLL_SECONDS = int(os.environ.get("OUTBOX_POLL_SECONDS", "30"))
+EMAIL_MAX_CONCURRENCY = int(os.environ.get("EMAIL_MAX_CONCURRENCY", "8"))
+
+# A claimed message is leased for this long; if the process dies mid-send
+# the row becomes due again and another pass picks it up.
+CLAIM_LEASE = timedelta(minutes=10)
+
+PENDING = "pending"
+SENDING = "sending"
+SENT = "sent"
+FAILED = "failed"
+
+_email_executor = ThreadPoolExecutor(max_workers=EMAIL_MAX_CONCURRENCY, thread_name_prefix="outbox-email")
+
+
+class PermanentDeliveryError(Exception):
+    pass
+
+
+PERMANENT_ERRORS = (PermanentDeliveryError, SlackWebhookRejected)
+
+
+def enqueue_email(db, user_id: int, notification_id: int | None, recipient: str, subject: str,
+                  plain_body: str, html_body: str):
+    db.add(OutboxMessage(
+        user_id=user_id,
+        notification_id=notification_id,
+        channel="email",
+        recipient=recipient,
+        subject=subject,
+        body=plain_body,
+        html_body=html_body,
+    ))
+
+
+def enqueue_slack(db, user_id: int, notification_id: int | None, payloads: list[dict]):
+    # One row per block-limited chunk, so a retry resends only the chunk that failed.
+    for payload in payloads:
+        db.add(OutboxMessage(
+            user_id=user_id,
+            notification_id=notification_id,
+            channel="slack",
+            recipient="slack",
+            subject=payload.get("text"),
+            body=json.dumps(payload),
+        ))
+
+
+def retry_delay(attempts: int) -> timedelta:
+    # Exponential backoff with jitter: ~1m, 2m, 4m, ... capped at 6h.
+    delay = min(OUTBOX_RETRY_BASE_SECONDS * 2 ** (attempts - 1), 6 * 3600)
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def _claim_due(limit: int) -> list[dict]:
+    now = datetime.utcnow()
+    db = database.SessionLocal()
+    try:
+        rows = db.execute(
+            select(OutboxMessage)
+            .where(OutboxMessage.status.in_((PENDING, SENDING)), OutboxMessage.next_attempt_at <= now)
+            .order_by(OutboxMessage.next_attempt_at, OutboxMessage.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        ).scalars().all()
+        claimed = [
+            {
+                "id": m.id,
+                "user_id": m.user_id,
+                "channel": m.channel,
+                "recipient": m.recipient,
+                "subject": m.subject,
+                "body": m.body,
+                "html_body": m.html_body,
+                "attempts": m.attempts,
+            }
+            for m in rows
+        ]
+        if claimed:
+            db.execute(
+                update(OutboxMessage)
+                .where(OutboxMessage.id.in_([m["id"] for m in claimed]))
+                .values(status=SENDING, next_attempt_at=now + CLAIM_LEASE)
+            )
+        db.commit()
+        return claimed
+    finally:
+        db.close()
+
+
+def _outcome(message: dict, error: Exception | None, now: datetime) -> dict:
+    attempts = message["attempts"] + 1
+    if error is None:
+        return {"status": SENT, "attempts": attempts, "sent_at": now, "last_error": None}
+    if isinstance(error, PERMANENT_ERRORS) or attempts >= OUTBOX_MAX_ATTEMPTS:
+        return {"status": FAILED, "attempts": attempts, "last_error": str(error)[:1000]}
+    return {
+        "status": PENDING,
+        "attempts": attempts,
+        "next_attempt_at": now + retry_delay(attempts),
+        "last_error": str(error)[:1000],
+    }
+
+
+def _record_results(results: list[tuple[dict, Exception | None]]) -> list[str]:
+    now = datetime.utcnow()
+    statuses = []
+    db = database.SessionLocal()
+    try:
+        for message, error in results:
+            values = _outcome(message, error, now)
+            db.execute(update(OutboxMessage).where(OutboxMessage.id == message["id"]).values(**values))
+            statuses.append(values["status"])
+        db.commit()
+    finally:
+        db.close()
+    return statuses
+
+
+def _send_email(message: dict, settings: dict):
+    if not settings["notify_email"] or not settings["smtp_user"] or not settings["smtp_password"]:
+        raise PermanentDeliveryError("Email is no longer configured for this user.")
+
+    msg = MIMEMultipart("alternative")
+    msg["Subject"] = message["subject"]
+    msg["From"] = settings["smtp_user"]
+    msg["To"] = message["recipient"]
+    msg.attach(MIMEText(message["body"], "plain"))
+    if message["html_body"]:
+        msg.attach(MIMEText(message["html_body"], "html"))
+
+    with metrics.track(metrics.NOTIFY, "smtp") as stage:
+        try:
+            smtp_pool.send(
+                settings["smtp_host"], int(settings["smtp_port"]), settings["smtp_user"],
+                settings["smtp_password"], message["recipient"], msg.as_string(),
+            )
+        except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused) as e:
+            stage.outcome = "rejected"
+            raise PermanentDeliveryError(str(e)) from e
+        except smtplib.SMTPResponseException as e:
+            if e.smtp_code >= 500:
+                stage.outcome = "rejected"
+                raise PermanentDeliveryError(f"{e.smtp_code} {e.smtp_error!r}") from e
+            raise
+
+
+def _send_slack(message: dict, webhook_url: str):
+    if not webhook_url:
+        raise PermanentDeliveryError("Slack is no longer configured for this user.")
+    return slack_client.submit(webhook_url, json.loads(message["body"]))
+
+
+def _deliver_batch(messages: list[dict]) -> list[tuple[dict, Exception | None]]:
+    from app.notify import get_email_settings, get_slack_webhook
+    # Credentials are read at send time so updated settings apply to
+    # queued retries, and are never copied into the outbox.
+    email_settings = {}
+    webhooks = {}
+    for m in messages:
+        uid = m["user_id"]
+        if m["channel"] == "email" and uid not in email_settings:
+            email_settings[uid] = get_email_settings(user_id=uid)
+        elif m["channel"] == "slack" and uid not in webhooks:
+            webhooks[uid] = get_slack_webhook(user_id=uid)
+
+    # Every send is started before any is awaited, so email and Slack
+    # deliveries run side by side, each under its own concurrency limit.
+    futures = []
+    results = []
+    for message in messages:
+        try:
+            if message["channel"] == "email":
+                future = _email_executor.submit(_send_email, message, email_settings[message["user_id"]])
+            elif message["channel"] == "slack":
+                future = _send_slack(message, webhooks[message["user_id"]])
+            else:
+                raise PermanentDeliveryError(f"Unknown channel {message['channel']!r}.")
+        except PermanentDeliveryError as e:
+            results.append((message, e))
+            continue
+        futures.append((message, future))
+
+    for message, future in futures:
+        error = future.exception()
+        if error is not None:
+            logger.warning(f"Delivery of outbox message {message['id']} to {message['recipient']} failed: {error}")
+        results.append((message, error))
+    return results
+
+
+def deliver_outbox() -> dict:
+    counts = {SENT: 0, PENDING: 0, FAILED: 0}
+    while True:
+        messages = _claim_due(OUTBOX_BATCH_SIZE)
+        if not messages:
+            break
+        for status in _record_results(_deliver_batch(messages)):
+            counts[status] += 1
+        if len(messages) < OUTBOX_BATCH_SIZE:
+            break
+    smtp_pool.close_idle()
+    if any(counts.values()):
+        logger.info(
+            f"Outbox pass: {counts[SENT]} sent, {counts[PENDING]} to retry, {counts[FAILED]} failed "
+            f"({smtp_pool.connects} SMTP connect(s), {smtp_pool.reuses} reuse(s) so far)."
+        )
+    return counts
@@ -0,0 +1,143 @@
+import os
+import re
+import logging
+from datetime import datetime, date, timedelta
+from sqlalchemy import text
+from app import database
+from app.models import Post, PostArchive
+
+logger = logging.getLogger(__name__)
+
+POSTS_RETENTION_DAYS = int(os.environ.get("POSTS_RETENTION_DAYS", "90"))
+POSTS_PARTITIONS_AHEAD = int(os.environ.get("POSTS_PARTITIONS_AHEAD", "7"))
+
+PARTITION_NAME_RE = re.compile(r"^posts_(\d{8})$")
+POST_COLUMNS = ", ".join(c.name for c in Post.__table__.columns if c.name in PostArchive.__table__.columns)
+
+
+def _partition_name(day: date) -> str:
+    return f"posts_{day:%Y%m%d}"
+
+
+def _retention_cutoff() -> date:
+    return datetime.utcnow().date() - timedelta(days=POSTS_RETENTION_DAYS)
+
+
+def _posts_relkind(conn) -> str | None:
+    return conn.execute(text(
+        "SELECT c.relkind FROM pg_class c "
+        "JOIN pg_namespace n ON n.oid = c.relnamespace "
+        "WHERE c.relname = 'posts' AND n.nspname = current_schema()"
+    )).scalar()
+
+
+def _list_partitions(conn) -> list[str]:
+    return list(conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = 'posts'"
+    )).scalars())
+
+
+def ensure_partitions(conn, start: date, end: date) -> int:
+    conn.execute(text("CREATE TABLE IF NOT EXISTS posts_default PARTITION OF posts DEFAULT"))
+    existing = set(_list_partitions(conn))
+    created = 0
+    day = start
+    while day <= end:
+        name = _partition_name(day)
+        if name not in existing:
+            try:
+                with conn.begin_nested():
+                    conn.execute(text(
+                        f"CREATE TABLE {name} PARTITION OF posts "
+                        f"FOR VALUES FROM ('{day.isoformat()}') TO ('{(day + timedelta(days=1)).isoformat()}')"
+                    ))
+                created += 1
+            except Exception as e:
+                # Usually means posts_default already holds rows for this day.
+                logger.warning(f"Could not create partition {name}: {e}")
+        day += timedelta(days=1)
+    return created
+
+
+def _migrate_legacy_posts(conn):
+    logger.info("Converting posts into a time-partitioned table...")
+    conn.execute(text("ALTER TABLE posts RENAME TO posts_legacy"))
+    conn.execute(text("ALTER TABLE posts_legacy RENAME CONSTRAINT posts_pkey TO posts_legacy_pkey"))
+    conn.execute(text("ALTER INDEX IF EXISTS ix_posts_post_hash RENAME TO ix_posts_legacy_post_hash"))
+    conn.execute(text("ALTER SEQUENCE IF EXISTS posts_id_seq RENAME TO posts_legacy_id_seq"))
+    # Copied by POST_COLUMNS; tables from before search have no such column.
+    conn.execute(text("ALTER TABLE posts_legacy ADD COLUMN IF NOT EXISTS search_vector tsvector"))
+    Post.__table__.create(conn)
+
+    cutoff = _retention_cutoff()
+    oldest = conn.execute(text(
+        "SELECT min(created_at) FROM posts_legacy WHERE created_at >= :cutoff"
+    ), {"cutoff": cutoff}).scalar()
+    start = oldest.date() if oldest else datetime.utcnow().date()
+    ensure_partitions(conn, start, datetime.utcnow().date() + timedelta(days=POSTS_PARTITIONS_AHEAD))
+
+    legacy_columns = POST_COLUMNS.replace("created_at", "COALESCE(created_at, now() AT TIME ZONE 'utc')")
+    moved = conn.execute(text(
+        f"INSERT INTO posts ({POST_COLUMNS}) SELECT {legacy_columns} FROM posts_legacy "
+        "WHERE created_at >= :cutoff OR created_at IS NULL"
+    ), {"cutoff": cutoff}).rowcount
+    archived = conn.execute(text(
+        f"INSERT INTO posts_archive ({POST_COLUMNS}) SELECT {POST_COLUMNS} FROM posts_legacy "
+        "WHERE created_at < :cutoff ON CONFLICT DO NOTHING"
+    ), {"cutoff": cutoff}).rowcount
+    conn.execute(text(
+        "SELECT setval(pg_get_serial_sequence('posts', 'id'), "
+        "COALESCE((SELECT max(id) FROM posts_legacy), 0) + 1, false)"
+    ))
+    conn.execute(text("DROP TABLE posts_legacy"))
+    logger.info(f"Posts table partitioned: {moved} rows kept, {archived} rows archived.")
+
+
+def prepare_posts_storage():
+    with database.engine.begin() as conn:
+        conn.execute(text("ALTER TABLE posts_archive ADD COLUMN IF NOT EXISTS search_vector tsvector"))
+        if _posts_relkind(conn) == "r":
+            _migrate_legacy_posts(conn)
+        try:
+            with conn.begin_nested():
+                conn.execute(text("ALTER TABLE posts_archive ALTER COLUMN post_text SET COMPRESSION lz4"))
+        except Exception as e:
+            logger.info(f"lz4 compression unavailable for posts_archive, using default: {e}")
+    run_partition_maintenance()
+
+
+def archive_expired_partitions(conn) -> int:
+    cutoff = _retention_cutoff()
+    archived = 0
+    for name in sorted(_list_partitions(conn)):
+        match = PARTITION_NAME_RE.match(name)
+        if not match or datetime.strptime(match.group(1), "%Y%m%d").date() >= cutoff:
+            continue
+        conn.execute(text(f"ALTER TABLE posts DETACH PARTITION {name}"))
+        rows = conn.execute(text(
+            f"INSERT INTO posts_archive ({POST_COLUMNS}) SELECT {POST_COLUMNS} FROM {name} "
+            "ON CONFLICT DO NOTHING"
+        )).rowcount
+        conn.execute(text(f"DROP TABLE {name}"))
+        logger.info(f"Archived partition {name} ({rows} rows).")
+        archived += rows
+
+    stray = conn.execute(text(
+        f"WITH moved AS (DELETE FROM posts_default WHERE created_at < :cutoff RETURNING {POST_COLUMNS}) "
+        f"INSERT INTO posts_archive ({POST_COLUMNS}) SELECT {POST_COLUMNS} FROM moved ON CONFLICT DO NOTHING"
+    ), {"cutoff": cutoff}).rowcount
+    return archived + stray
+
+
+def run_partition_maintenance():
+    today = datetime.utcnow().date()
+    try:
+        with database.engine.begin() as conn:
+            created = ensure_partitions(conn, today - timedelta(days=1), today + timedelta(days=POSTS_PARTITIONS_AHEAD))
+            archived = archive_expired_partitions(conn)
+        logger.info(f"Partition maintenance done: {created} partition(s) created, {archived} post(s) archived.")
+    except Exception as e:
+        logger.error(f"Partition maintenance failed: {e}", exc_info=True)
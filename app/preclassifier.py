@@ -0,0 +1,258 @@
+import os
+import re
+import math
+import time
+import random
+import logging
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from sqlalchemy import select, or_
+from app import database, metrics
+from app.models import Post
+
+logger = logging.getLogger(__name__)
+
+# Local first tier in front of analyze_post(). Keyword rules plus a naive
+# Bayes model (linear in log space) trained on posts the LLM already
+# labeled. Only confident "Other" posts are decided locally; anything
+# uncertain, or that looks like Funding/Hiring/Launch, still goes to the
+# LLM for a real summary and reply.
+
+CATEGORIES = ("Funding", "Hiring", "Launch", "Other")
+LOCAL_CATEGORY = "Other"
+
+PRECLASSIFIER_ENABLED = os.environ.get("PRECLASSIFIER_ENABLED", "1").lower() in ("1", "true", "yes")
+PRECLASSIFIER_MIN_CONFIDENCE = float(os.environ.get("PRECLASSIFIER_MIN_CONFIDENCE", "0.95"))
+# Fraction of locally decidable posts still sent to the LLM, so agreement
+# keeps being measured on exactly the posts the local tier handles.
+PRECLASSIFIER_AUDIT_RATE = float(os.environ.get("PRECLASSIFIER_AUDIT_RATE", "0.05"))
+PRECLASSIFIER_MIN_TRAINING = int(os.environ.get("PRECLASSIFIER_MIN_TRAINING", "300"))
+PRECLASSIFIER_MAX_TRAINING = int(os.environ.get("PRECLASSIFIER_MAX_TRAINING", "20000"))
+PRECLASSIFIER_RETRAIN_SECONDS = int(os.environ.get("PRECLASSIFIER_RETRAIN_SECONDS", str(24 * 3600)))
+
+MAX_TEXT_CHARS = 2000
+SUMMARY_CHARS = 200
+
+RULES = {
+    "Funding": re.compile(
+        r"\b(rais(?:ed|ing)|series [a-e]\b|pre-seed|seed round|funding round|led by|backed by|"
+        r"investors?|valuation|closed (?:our|a) (?:round|\$))", re.I,
+    ),
+    "Hiring": re.compile(
+        r"\b(we(?:'re| are) hiring|is hiring|now hiring|join (?:our|the) team|open (?:roles?|positions?)|"
+        r"job opening|apply (?:here|now|today)|looking for (?:an?|our next) )", re.I,
+    ),
+    "Launch": re.compile(
+        r"\b(launch(?:ed|ing)?|introducing|now available|just shipped|product hunt|"
+        r"announcing|unveil(?:ed|ing)?|released? (?:our|the|a) new)\b", re.I,
+    ),
+}
+RESHARE_RE = re.compile(r"^\s*(?:reposted|shared|resharing)\b|#throwback", re.I)
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9'+#$-]*")
+SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s")
+
+
+def features(text: str) -> set[str]:
+    text = text[:MAX_TEXT_CHARS]
+    tokens = TOKEN_RE.findall(text.lower())
+    found = set(tokens)
+    found.update(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+    found.update(f"__rule:{name}" for name, rule in RULES.items() if rule.search(text))
+    if RESHARE_RE.search(text):
+        found.add("__reshare")
+    return found
+
+
+class NaiveBayesModel:
+    # Multinomial naive Bayes over binary (present/absent) features with
+    # Laplace smoothing. Features seen fewer than min_count times are dropped.
+    def __init__(self, alpha: float = 1.0, min_count: int = 2):
+        self.alpha = alpha
+        self.min_count = min_count
+        self.priors: dict[str, float] = {}
+        self.weights: dict[str, dict[str, float]] = {}
+        self.trained_on = 0
+
+    def fit(self, texts: list[str], labels: list[str]) -> "NaiveBayesModel":
+        per_class = {c: Counter() for c in CATEGORIES}
+        docs = Counter()
+        for text, label in zip(texts, labels):
+            per_class[label].update(features(text))
+            docs[label] += 1
+        totals = Counter()
+        for counts in per_class.values():
+            totals.update(counts)
+        vocabulary = {f for f, n in totals.items() if n >= self.min_count}
+        self.trained_on = sum(docs.values())
+        for c in CATEGORIES:
+            counts = per_class[c]
+            denominator = sum(counts[f] for f in vocabulary) + self.alpha * len(vocabulary)
+            self.priors[c] = math.log((docs[c] + 1) / (self.trained_on + len(CATEGORIES)))
+            self.weights[c] = {f: math.log((counts[f] + self.alpha) / denominator) for f in vocabulary}
+        return self
+
+    def predict_proba(self, found: set[str]) -> dict[str, float]:
+        scores = {}
+        for c in CATEGORIES:
+            weights = self.weights[c]
+            scores[c] = self.priors[c] + sum(weights[f] for f in found if f in weights)
+        top = max(scores.values())
+        exp = {c: math.exp(s - top) for c, s in scores.items()}
+        total = sum(exp.values())
+        return {c: v / total for c, v in exp.items()}
+
+
+@dataclass(frozen=True)
+class Prediction:
+    category: str
+    confidence: float
+    rule_hits: tuple[str, ...]
+    from_model: bool
+
+
+def _normalize(category: str | None) -> str:
+    for c in CATEGORIES:
+        if category and category.strip().lower() == c.lower():
+            return c
+    return "Other"
+
+
+_model: NaiveBayesModel | None = None
+_trained_at: float | None = None
+_model_lock = threading.Lock()
+
+
+def load_training_data(limit: int = PRECLASSIFIER_MAX_TRAINING) -> tuple[list[str], list[str]]:
+    # Only LLM labels (NULL predates the pre-classifier); training on local
+    # decisions would feed the model its own output. Newest first.
+    from app.ai import FALLBACK_SUMMARY
+    db = database.SessionLocal()
+    try:
+        rows = db.execute(
+            select(Post.post_text, Post.category)
+            .where(
+                Post.category.is_not(None),
+                or_(Post.category_source.is_(None), Post.category_source == "llm"),
+                or_(Post.summary.is_(None), Post.summary != FALLBACK_SUMMARY),
+            )
+            .order_by(Post.created_at.desc())
+            .limit(limit)
+        ).all()
+    finally:
+        db.close()
+    return [r.post_text for r in rows], [_normalize(r.category) for r in rows]
+
+
+def _stale() -> bool:
+    return _trained_at is None or time.monotonic() - _trained_at >= PRECLASSIFIER_RETRAIN_SECONDS
+
+
+def get_model() -> NaiveBayesModel | None:
+    global _model, _trained_at
+    if not _stale():
+        return _model
+    with _model_lock:
+        if _stale():
+            started = time.perf_counter()
+            try:
+                texts, labels = load_training_data()
+            except Exception as e:
+                logger.error(f"Could not load pre-classifier training data: {e}")
+                texts, labels = [], []
+            if len(texts) >= PRECLASSIFIER_MIN_TRAINING:
+                _model = NaiveBayesModel().fit(texts, labels)
+                logger.info(
+                    f"Pre-classifier trained on {len(texts)} LLM-labeled post(s) "
+                    f"{dict(Counter(labels))} in {time.perf_counter() - started:.2f}s."
+                )
+            else:
+                _model = None
+                logger.info(
+                    f"Pre-classifier has {len(texts)} labeled post(s), needs {PRECLASSIFIER_MIN_TRAINING}; "
+                    "every post goes to the LLM for now."
+                )
+            _trained_at = time.monotonic()
+    return _model
+
+
+def predict(text: str) -> Prediction:
+    found = features(text)
+    hits = tuple(name for name in RULES if f"__rule:{name}" in found)
+    model = get_model()
+    if model is None:
+        # Rules alone never reach the confidence needed to skip the LLM.
+        return Prediction(hits[0] if hits else LOCAL_CATEGORY, 0.5, hits, False)
+    proba = model.predict_proba(found)
+    category = max(proba, key=proba.get)
+    return Prediction(category, proba[category], hits, True)
+
+
+def choose_route(prediction: Prediction) -> str:
+    # "local" skips the LLM; "audit" is a decidable post sent to the LLM
+    # anyway; "llm" is everything else.
+    decidable = (
+        PRECLASSIFIER_ENABLED
+        and prediction.from_model
+        and prediction.category == LOCAL_CATEGORY
+        and not prediction.rule_hits
+        and prediction.confidence >= PRECLASSIFIER_MIN_CONFIDENCE
+    )
+    if decidable and random.random() < PRECLASSIFIER_AUDIT_RATE:
+        route = "audit"
+    else:
+        route = "local" if decidable else "llm"
+    metrics.preclassifier_decisions_total.labels(route, prediction.category).inc()
+    return route
+
+
+def record_agreement(prediction: Prediction, route: str, llm_category: str):
+    # Only the audit route measures the posts the local tier would decide.
+    if prediction.from_model:
+        metrics.preclassifier_agreement_total.labels(route, prediction.category, _normalize(llm_category)).inc()
+
+
+def local_analysis(text: str, prediction: Prediction) -> dict:
+    # Extractive summary; the suggested reply, as for LLM-analyzed posts,
+    # is generated when first requested.
+    first = SENTENCE_END_RE.split(" ".join(text.split()), maxsplit=1)[0]
+    if len(first) > SUMMARY_CHARS:
+        first = first[:SUMMARY_CHARS - 1].rstrip() + "…"
+    return {"summary": first, "category": prediction.category, "suggested_reply": None}
+
+
+def evaluate(holdout: float = 0.2):
+    # Trains on older labels and scores the newest ones, as if the newest
+    # had arrived after training.
+    texts, labels = load_training_data()
+    split = int(len(texts) * holdout)
+    if split == 0 or len(texts) - split < PRECLASSIFIER_MIN_TRAINING:
+        print(f"Only {len(texts)} labeled post(s); need {PRECLASSIFIER_MIN_TRAINING} plus a holdout.")
+        return
+    model = NaiveBayesModel().fit(texts[split:], labels[split:])
+    results = []
+    for text, label in zip(texts[:split], labels[:split]):
+        found = features(text)
+        proba = model.predict_proba(found)
+        category = max(proba, key=proba.get)
+        has_rule = any(f"__rule:{name}" in found for name in RULES)
+        results.append((label, category, proba[category], has_rule))
+
+    correct = sum(label == category for label, category, _, _ in results)
+    print(f"Trained on {len(texts) - split}, scored {split} newer post(s): accuracy {correct / split:.1%}")
+    print("  " + "llm \\ local".ljust(12) + "".join(f"{c:>9}" for c in CATEGORIES))
+    for actual in CATEGORIES:
+        row = Counter(category for label, category, _, _ in results if label == actual)
+        print(f"  {actual:<12}" + "".join(f"{row[c]:>9}" for c in CATEGORIES))
+    print(f"  {'threshold':>10} {'skipped':>9} {'agreement':>10}")
+    for threshold in (0.8, 0.9, 0.95, 0.98, 0.99):
+        skipped = [(label, category) for label, category, confidence, has_rule in results
+                   if category == LOCAL_CATEGORY and not has_rule and confidence >= threshold]
+        agree = sum(label == category for label, category in skipped)
+        rate = f"{agree / len(skipped):.1%}" if skipped else "-"
+        print(f"  {threshold:>10.2f} {len(skipped) / split:>9.1%} {rate:>10}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    evaluate()
@@ -0,0 +1,188 @@
+import os
+import re
+import sys
+import time
+import queue
+import random
+import logging
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = Path(os.environ.get("PROFILE_DIR", "/tmp/profiles"))
+PROFILE_MAX_FILES = int(os.environ.get("PROFILE_MAX_FILES", "100"))
+PROFILE_INTERVAL_MS = float(os.environ.get("PROFILE_INTERVAL_MS", "10"))
+
+# Threads that run request work off the event loop (starlette's threadpool).
+WORKER_THREAD_PREFIXES = ("AnyIO worker thread",)
+_QUEUE_GET = queue.Queue.get.__code__
+
+_NAME_RE = re.compile(r"^\d{8}T\d{6}-\d{6}-(request|job)-[\w.-]+\.folded$")
+
+
+@dataclass
+class ProfilingConfig:
+    # Fraction of HTTP requests to profile; 0 turns request profiling off.
+    request_sample_rate: float = float(os.environ.get("PROFILE_REQUEST_SAMPLE_RATE", "0"))
+    # Profile every scheduled daily job run.
+    profile_jobs: bool = os.environ.get("PROFILE_JOBS", "").lower() in ("1", "true", "yes")
+
+
+config = ProfilingConfig()
+
+
+class SamplingProfiler:
+    # Statistical profiler: a daemon thread reads the target thread's stack
+    # every interval via sys._current_frames() and counts identical stacks.
+    # Nothing is hooked into the profiled code, so overhead is the sampler
+    # thread's own work, and zero when no profile is running.
+    #
+    # With include_workers, busy threadpool workers are sampled as well
+    # (sync handlers and run_in_threadpool calls run there), each stack
+    # rooted at its thread name; idle workers blocked on their queue are
+    # skipped.
+    def __init__(self, thread_id: int, interval: float = PROFILE_INTERVAL_MS / 1000, include_workers: bool = False):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.include_workers = include_workers
+        self.stacks: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+    def _targets(self) -> dict[int, str | None]:
+        targets = {self.thread_id: None}
+        if self.include_workers:
+            for thread in threading.enumerate():
+                if thread.name.startswith(WORKER_THREAD_PREFIXES):
+                    targets[thread.ident] = thread.name
+        return targets
+
+    def _run(self):
+        labels = {}
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            for thread_id, root in self._targets().items():
+                frame = frames.get(thread_id)
+                names = []
+                while frame is not None:
+                    code = frame.f_code
+                    if root is not None and code is _QUEUE_GET:
+                        names = None
+                        break
+                    name = labels.get(code)
+                    if name is None:
+                        name = labels[code] = _frame_label(code)
+                    names.append(name)
+                    frame = frame.f_back
+                if not names:
+                    continue
+                if root is not None:
+                    names.append(root)
+                names.reverse()
+                self.stacks[";".join(names)] += 1
+
+
+def _frame_label(code) -> str:
+    path = Path(code.co_filename)
+    return f"{code.co_name} ({path.parent.name}/{path.name}:{code.co_firstlineno})"
+
+
+def _slug(label: str) -> str:
+    return re.sub(r"[^\w.-]+", "_", label).strip("_")[:80] or "unnamed"
+
+
+def _write(kind: str, label: str, stacks: Counter) -> Path | None:
+    if not stacks:
+        return None
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    path = PROFILE_DIR / f"{datetime.utcnow():%Y%m%dT%H%M%S-%f}-{kind}-{_slug(label)}.folded"
+    # Collapsed-stack format ("frame;frame;frame count"), readable by
+    # flamegraph.pl, speedscope and inferno.
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text("".join(f"{stack} {count}\n" for stack, count in stacks.most_common()))
+    tmp.replace(path)
+    for old in sorted(PROFILE_DIR.glob("*.folded"))[:-PROFILE_MAX_FILES]:
+        old.unlink(missing_ok=True)
+    return path
+
+
+@contextmanager
+def profiled(kind: str, label: str, include_workers: bool = False):
+    # Samples the calling thread for the duration of the block.
+    profiler = SamplingProfiler(threading.get_ident(), include_workers=include_workers)
+    started = time.perf_counter()
+    profiler.start()
+    try:
+        yield
+    finally:
+        stacks = profiler.stop()
+        try:
+            path = _write(kind, label, stacks)
+        except OSError as e:
+            logger.warning(f"Could not save {kind} profile: {e}")
+        else:
+            if path:
+                logger.info(
+                    f"Saved {kind} profile {path.name} "
+                    f"({sum(stacks.values())} samples over {time.perf_counter() - started:.2f}s)."
+                )
+
+
+def list_profiles() -> list[dict]:
+    if not PROFILE_DIR.is_dir():
+        return []
+    profiles = []
+    for path in sorted(PROFILE_DIR.glob("*.folded"), reverse=True):
+        if not _NAME_RE.match(path.name):
+            continue
+        stat = path.stat()
+        profiles.append({
+            "name": path.name,
+            "kind": path.name.split("-")[2],
+            "size_bytes": stat.st_size,
+            "created_at": datetime.utcfromtimestamp(stat.st_mtime),
+        })
+    return profiles
+
+
+def profile_path(name: str) -> Path | None:
+    # Only names this module wrote are served, so the path cannot escape PROFILE_DIR.
+    if not _NAME_RE.match(name):
+        return None
+    path = PROFILE_DIR / name
+    return path if path.is_file() else None
+
+
+class ProfilingMiddleware:
+    # Plain ASGI middleware: when sampling is off the cost per request is a
+    # float comparison. A sampled request profiles the event loop thread and
+    # the threadpool, so concurrent requests show up in its profile too; only
+    # one request is profiled at a time to keep that bounded.
+    def __init__(self, app):
+        self.app = app
+        self._active = threading.Lock()
+
+    async def __call__(self, scope, receive, send):
+        rate = config.request_sample_rate
+        if scope["type"] != "http" or rate <= 0 or random.random() >= rate:
+            return await self.app(scope, receive, send)
+        if not self._active.acquire(blocking=False):
+            return await self.app(scope, receive, send)
+        try:
+            with profiled("request", f"{scope['method']} {scope['path']}", include_workers=True):
+                await self.app(scope, receive, send)
+        finally:
+            self._active.release()
@@ -0,0 +1,227 @@
+import os
+import re
+import logging
+from dataclasses import dataclass
+from app.preclassifier import RULES
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+# Post text is the only unbounded part of the analysis prompt. Posts over
+# this many tokens are compressed, then trimmed to the opening plus the
+# sentences most likely to decide the category.
+PROMPT_MAX_POST_TOKENS = int(os.environ.get("PROMPT_MAX_POST_TOKENS", "800"))
+# Share of the budget reserved for the opening, which usually says what the
+# post is about.
+PROMPT_HEAD_SHARE = 0.4
+OMISSION = " […] "
+
+URL_RE = re.compile(r"https?://\S+|www\.\S+", re.I)
+REPEAT_RE = re.compile(r"([!?.\-_=*~])\1{2,}")
+HASHTAG_RE = re.compile(r"#\w+")
+SPACE_RE = re.compile(r"[ \t\u00a0]+")
+BLANK_LINES_RE = re.compile(r"\n\s*\n+")
+SENTENCE_RE = re.compile(r"[^.!?。！？\n]+(?:[.!?。！？]+|\n|$)")
+FIGURE_RE = re.compile(r"[$€£%]|\d")
+# Rough stand-in for a BPE tokenizer: letter runs, digit groups of up to
+# three and single symbols, as the o200k/cl100k pre-tokenizers split them.
+ESTIMATE_RE = re.compile(r"[^\W\d_]+|\d{1,3}|[^\w\s]")
+MAX_HASHTAGS = 5
+
+_encoding = None
+
+
+def _get_encoding():
+    global _encoding
+    if _encoding is None and tiktoken is not None:
+        try:
+            _encoding = tiktoken.get_encoding("o200k_base")
+        except Exception as e:
+            # The encoding file is downloaded on first use; without network
+            # access the estimate is used instead.
+            logger.warning(f"tiktoken encoding unavailable, estimating tokens: {e}")
+            _encoding = False
+    return _encoding or None
+
+
+def count_tokens(text: str) -> int:
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    tokens = 0
+    for piece in ESTIMATE_RE.findall(text):
+        if piece.isascii():
+            # Common English words are one token; longer ones split into
+            # pieces of roughly four to five characters.
+            tokens += 1 + (len(piece) - 1) // 5
+        else:
+            tokens += len(piece)
+    return tokens
+
+
+def compress(text: str) -> str:
+    # Lossless for classification: links become placeholders, runs of
+    # punctuation and whitespace collapse, trailing hashtag walls are capped.
+    text = URL_RE.sub("[link]", text)
+    text = REPEAT_RE.sub(r"\1", text)
+    text = SPACE_RE.sub(" ", text)
+    text = BLANK_LINES_RE.sub("\n", text).strip()
+    hashtags = HASHTAG_RE.findall(text)
+    if len(hashtags) > MAX_HASHTAGS:
+        for tag in hashtags[MAX_HASHTAGS:]:
+            text = text.replace(tag, "", 1)
+        text = SPACE_RE.sub(" ", text).strip()
+    return text
+
+
+def _sentences(text: str) -> list[str]:
+    # Repeated sentences add nothing to the analysis; keep the first.
+    seen = set()
+    sentences = []
+    for sentence in SENTENCE_RE.findall(text):
+        sentence = sentence.strip()
+        if sentence and sentence.lower() not in seen:
+            seen.add(sentence.lower())
+            sentences.append(sentence)
+    return sentences
+
+
+def _cut_tokens(text: str, budget: int) -> str:
+    # For text with no word boundary to cut at (CJK, one huge token).
+    # Always keeps at least one character.
+    encoding = _get_encoding()
+    if encoding is not None:
+        cut = encoding.decode(encoding.encode(text, disallowed_special=())[:max(budget, 1)])
+        return cut or text[:1]
+    low, high = 1, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if count_tokens(text[:middle]) <= budget:
+            low = middle
+        else:
+            high = middle - 1
+    return text[:low]
+
+
+def _truncate(text: str, budget: int) -> str:
+    words = text.split()
+    while len(words) > 1 and count_tokens(" ".join(words)) > budget:
+        words = words[:max(1, int(len(words) * 0.9))]
+    text = " ".join(words)
+    if count_tokens(text) > budget:
+        text = _cut_tokens(text, budget)
+    return text
+
+
+def _score(sentence: str) -> int:
+    score = 3 * sum(1 for rule in RULES.values() if rule.search(sentence))
+    if FIGURE_RE.search(sentence):
+        score += 1
+    return score
+
+
+@dataclass(frozen=True)
+class FittedText:
+    text: str
+    tokens: int
+    original_tokens: int
+    # True when sentences were dropped, not just compressed.
+    trimmed: bool = False
+
+
+def fit_to_budget(text: str, budget: int = PROMPT_MAX_POST_TOKENS) -> FittedText:
+    original = count_tokens(text)
+    if original <= budget:
+        return FittedText(text, original, original)
+    text = compress(text)
+    tokens = count_tokens(text)
+    if tokens <= budget:
+        return FittedText(text, tokens, original)
+
+    sentences = _sentences(text)
+    costs = [count_tokens(s) + 1 for s in sentences]
+    omission_cost = count_tokens(OMISSION)
+    if sum(costs) <= budget:
+        fitted = " ".join(sentences)
+        return FittedText(fitted, count_tokens(fitted), original, trimmed=True)
+    keep = set()
+    used = 0
+    head_budget = int(budget * PROMPT_HEAD_SHARE)
+    for i, cost in enumerate(costs):
+        if used + cost > head_budget:
+            break
+        keep.add(i)
+        used += cost
+    cut_head = not keep
+    if cut_head:
+        # A single opening sentence longer than the head share.
+        limit = head_budget if len(sentences) > 1 else budget - omission_cost
+        sentences[0] = _truncate(sentences[0], limit)
+        costs[0] = count_tokens(sentences[0]) + 1
+        keep.add(0)
+        used = costs[0]
+
+    rest = sorted(
+        (i for i in range(len(sentences)) if i not in keep),
+        key=lambda i: (-_score(sentences[i]), i),
+    )
+    for i in rest:
+        if used + costs[i] + omission_cost <= budget:
+            keep.add(i)
+            used += costs[i] + omission_cost
+
+    parts = []
+    previous = -1
+    for i in sorted(keep):
+        if parts and (i != previous + 1 or (cut_head and previous == 0)):
+            parts.append(OMISSION)
+        elif parts:
+            parts.append(" ")
+        parts.append(sentences[i])
+        previous = i
+    if previous != len(sentences) - 1 or (cut_head and previous == 0):
+        parts.append(OMISSION.rstrip())
+    fitted = "".join(parts)
+    return FittedText(fitted, count_tokens(fitted), original, trimmed=True)
+
+
+def _post_block(post_text: str, author_name: str) -> tuple[str, FittedText]:
+    post = fit_to_budget(post_text)
+    if post.trimmed:
+        logger.debug(f"Post by {author_name} trimmed from {post.original_tokens} to {post.tokens} tokens")
+    label = "Post (excerpt, […] marks omitted text)" if post.trimmed else "Post"
+    return f"{label}: {post.text}", post
+
+
+def analysis_prompt(post_text: str, author_name: str) -> tuple[str, FittedText]:
+    # Summary and category only; replies are generated on demand
+    # (reply_prompt), since most posts never have theirs opened.
+    block, post = _post_block(post_text, author_name)
+    prompt = f"""Analyze the following LinkedIn post by {author_name}.
+
+{block}
+
+Respond in JSON with these fields:
+- "summary": A single-sentence summary of the post.
+- "category": Classify as one of: "Funding", "Hiring", "Launch", "Other".
+
+Return only valid JSON, no markdown."""
+    return prompt, post
+
+
+def reply_prompt(post_text: str, author_name: str, summary: str | None, category: str | None) -> tuple[str, FittedText]:
+    block, post = _post_block(post_text, author_name)
+    context = f"\nSummary: {summary}\nCategory: {category or 'Other'}\n" if summary else ""
+    prompt = f"""Write a reply to the following LinkedIn post by {author_name}.
+
+{block}
+{context}
+Respond in JSON with one field:
+- "suggested_reply": A short, professional congratulatory reply (1-2 sentences).
+
+Return only valid JSON, no markdown."""
+    return prompt, post
@@ -1,36 +1,63 @@
 import asyncio
 import hashlib
 import logging
-from datetime import datetime, timedelta
+import time
+from contextlib import nullcontext
+from datetime import datetime, timedelta, timezone
+from apscheduler.jobstores.base import JobLookupError
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 from sqlalchemy import or_
-from app.database import SessionLocal
 from app.models import Profile, Post, User
 from app.linkedin import get_recent_posts
-from app.ai import analyze_post
+from app.ai import analyze_post, generate_reply, REPLY_PREFETCH_CATEGORIES
 from app.notify import send_digest
+from app.outbox import deliver_outbox, OUTBOX_POLL_SECONDS
+from app.partitions import run_partition_maintenance
+from app.search import search_vector_expr
+from app.analytics import record_post
+from app import database, versions, metrics, profiling, preclassifier, neardup
 
 logger = logging.getLogger(__name__)
 
 scheduler = BackgroundScheduler()
 
+OUTBOX_JOB_ID = "outbox_delivery"
 
-def run_daily_job(user_id: int = None):
+
+def run_daily_job(user_id: int = None, profile: bool = None):
+    # profile=None falls back to the runtime toggle for scheduled runs.
+    if profile is None:
+        profile = profiling.config.profile_jobs
     logger.info(f"Starting daily relationship intelligence job (user_id={user_id})...")
     loop = asyncio.new_event_loop()
     asyncio.set_event_loop(loop)
+    started = time.perf_counter()
+    outcome = "ok"
     try:
-        loop.run_until_complete(_daily_job(user_id=user_id))
+        with profiling.profiled("job", f"user-{user_id}") if profile else nullcontext():
+            loop.run_until_complete(_daily_job(user_id=user_id))
     except Exception as e:
+        outcome = "error"
         logger.error(f"Daily job failed: {e}", exc_info=True)
     finally:
         loop.close()
+        metrics.job_seconds.labels(outcome).observe(time.perf_counter() - started)
+        wake_outbox()
+
+
+def wake_outbox():
+    # Pull the next delivery pass forward instead of waiting for the poll.
+    try:
+        scheduler.modify_job(OUTBOX_JOB_ID, next_run_time=datetime.now(timezone.utc))
+    except JobLookupError:
+        pass
 
 
 def run_all_users_job():
     logger.info("Running scheduled daily job for all users...")
-    db = SessionLocal()
+    db = database.SessionLocal()
     try:
         users = db.query(User).all()
         if not users:
@@ -45,8 +72,22 @@ def run_all_users_job():
         db.close()
 
 
+def _prefetch_reply(post_text: str, author_name: str, ai_result: dict) -> str | None:
+    # A failed prefetch only means the reply is generated on request later.
+    with metrics.track(metrics.AI_REPLY, "openai") as stage:
+        try:
+            reply = generate_reply(post_text, author_name, ai_result["summary"], ai_result["category"])
+        except Exception as e:
+            stage.outcome = "error"
+            logger.warning(f"Could not prefetch reply for post by {author_name}: {e}")
+            return None
+    if reply:
+        metrics.suggested_replies_total.labels("prefetch").inc()
+    return reply
+
+
 async def _daily_job(user_id: int = None):
-    db = SessionLocal()
+    db = database.SessionLocal()
     try:
         q = db.query(Profile)
         if user_id is not None:
@@ -58,6 +99,7 @@ async def _daily_job(user_id: int = None):
             return
 
         logger.info(f"Processing {len(profiles)} profiles...")
+        profile_ids = [p.id for p in profiles]
         digest_entries = []
 
         for profile in profiles:
@@ -82,19 +124,48 @@ async def _daily_job(user_id: int = None):
                     f"{profile.id}:{post_text[:500]}".encode()
                 ).hexdigest()
 
-                existing = db.query(Post).filter(
-                    Post.profile_id == profile.id,
-                    or_(
-                        Post.post_url == post_url if post_url else False,
-                        Post.post_hash == content_hash,
-                    ),
-                ).first()
+                fingerprint = neardup.simhash(post_text)
+                original = None
+                with metrics.track(metrics.DEDUP, "postgres") as stage:
+                    existing = db.query(Post).filter(
+                        Post.profile_id == profile.id,
+                        or_(
+                            Post.post_url == post_url if post_url else False,
+                            Post.post_hash == content_hash,
+                        ),
+                    ).first()
+                    if not existing:
+                        original = neardup.find_near_duplicate(db, profile_ids, post_text, fingerprint)
+                    stage.outcome = "duplicate" if existing else "near_duplicate" if original else "new"
 
                 if existing:
                     logger.debug(f"Post already exists for {profile.name}")
                     continue
 
-                ai_result = analyze_post(post_data["post_text"], profile.name)
+                if original is not None:
+                    # Linked to the original rather than re-analyzed, and
+                    # left out of the digest, which already covered it.
+                    logger.info(f"Post by {profile.name} is a near-duplicate of post {original.id}")
+                    ai_result = {
+                        "summary": original.summary,
+                        "category": original.category,
+                        "suggested_reply": original.suggested_reply,
+                    }
+                    category_source = "duplicate"
+                else:
+                    prediction = preclassifier.predict(post_text)
+                    route = preclassifier.choose_route(prediction)
+                    if route == "local":
+                        with metrics.track(metrics.AI_ANALYSIS, "local"):
+                            ai_result = preclassifier.local_analysis(post_text, prediction)
+                        category_source = "local"
+                    else:
+                        with metrics.track(metrics.AI_ANALYSIS, "openai"):
+                            ai_result = analyze_post(post_data["post_text"], profile.name)
+                        preclassifier.record_agreement(prediction, route, ai_result["category"])
+                        category_source = "llm"
+                    if ai_result["category"] in REPLY_PREFETCH_CATEGORIES:
+                        ai_result["suggested_reply"] = _prefetch_reply(post_text, profile.name, ai_result)
 
                 new_post = Post(
                     profile_id=profile.id,
@@ -104,12 +175,24 @@ async def _daily_job(user_id: int = None):
                     post_timestamp=post_data.get("post_timestamp"),
                     summary=ai_result["summary"],
                     category=ai_result["category"],
+                    category_source=category_source,
                     suggested_reply=ai_result["suggested_reply"],
+                    simhash=fingerprint,
+                    duplicate_of_id=original.id if original is not None else None,
+                    search_vector=search_vector_expr(profile.name, ai_result["summary"], post_text),
                 )
-                db.add(new_post)
-                db.commit()
+                with metrics.track(metrics.DB_WRITE, "postgres"):
+                    db.add(new_post)
+                    db.flush()
+                    post_id = new_post.id
+                    record_post(db, profile, ai_result["category"], post_data.get("post_timestamp"))
+                    db.commit()
+                versions.bump(profile.user_id, versions.POSTS)
+                if original is not None:
+                    continue
 
                 digest_entries.append({
+                    "post_id": post_id,
                     "name": profile.name,
                     "category": ai_result["category"],
                     "summary": ai_result["summary"],
@@ -118,7 +201,8 @@ async def _daily_job(user_id: int = None):
                 })
 
         profile_names = [p.name for p in profiles]
-        send_digest(digest_entries, profile_names=profile_names, user_id=user_id)
+        with metrics.track(metrics.NOTIFY, "outbox"):
+            send_digest(digest_entries, profile_names=profile_names, user_id=user_id)
         if digest_entries:
             logger.info(f"Daily digest sent with {len(digest_entries)} new posts.")
         else:
@@ -139,5 +223,23 @@ def start_scheduler():
         name="Daily LinkedIn Relationship Intelligence",
         replace_existing=True,
     )
+    scheduler.add_job(
+        run_partition_maintenance,
+        trigger=CronTrigger(hour=0, minute=5, timezone="UTC"),
+        id="posts_partition_maintenance",
+        name="Posts partition maintenance and archival",
+        replace_existing=True,
+        # Also run once at startup, which init_db() used to do.
+        next_run_time=datetime.now(timezone.utc),
+    )
+    scheduler.add_job(
+        deliver_outbox,
+        trigger=IntervalTrigger(seconds=OUTBOX_POLL_SECONDS),
+        id=OUTBOX_JOB_ID,
+        name="Outbox delivery",
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True,
+    )
     scheduler.start()
     logger.info("Scheduler started. Daily job scheduled for 8:00 AM.")
@@ -0,0 +1,104 @@
+import logging
+from sqlalchemy import select, func, text, cast, literal_column, or_, and_, union_all, REAL
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import database
+from app.models import Post, PostArchive, Profile
+
+logger = logging.getLogger(__name__)
+
+SEARCH_CONFIG = "english"
+
+
+def _weighted(value, weight: str):
+    return func.setweight(
+        func.to_tsvector(SEARCH_CONFIG, func.coalesce(value, "")),
+        literal_column(f"'{weight}'"),
+    )
+
+
+def search_vector_expr(profile_name, summary, post_text):
+    return (
+        _weighted(profile_name, "A")
+        .op("||")(_weighted(summary, "B"))
+        .op("||")(_weighted(post_text, "C"))
+    )
+
+
+def prepare_search_index():
+    # Archived posts keep the vector they had in posts; this backfills rows
+    # from before search existed, in either table.
+    for table in ("posts", "posts_archive"):
+        with database.engine.begin() as conn:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector"))
+            conn.execute(text(
+                f"CREATE INDEX IF NOT EXISTS ix_{table}_search_vector ON {table} USING gin (search_vector)"
+            ))
+            backfilled = conn.execute(text(
+                f"UPDATE {table} SET search_vector = "
+                f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(profiles.name, '')), 'A') || "
+                f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce({table}.summary, '')), 'B') || "
+                f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce({table}.post_text, '')), 'C') "
+                f"FROM profiles WHERE profiles.id = {table}.profile_id AND {table}.search_vector IS NULL"
+            )).rowcount
+        if backfilled:
+            logger.info(f"Backfilled search vectors for {backfilled} row(s) in {table}.")
+
+
+def parse_cursor(cursor: str) -> tuple[float, int]:
+    rank, _, post_id = cursor.partition(":")
+    return float(rank), int(post_id)
+
+
+def _matches(model, user_id: int, query, categories: list[str] | None):
+    stmt = (
+        select(
+            model.id, model.profile_id, Profile.name.label("profile_name"), model.summary,
+            model.category, model.post_url, model.post_timestamp, model.created_at,
+            func.left(model.post_text, 300).label("preview"),
+            func.ts_rank_cd(model.search_vector, query).label("rank"),
+        )
+        .join(Profile, Profile.id == model.profile_id)
+        .where(Profile.user_id == user_id, model.search_vector.op("@@")(query))
+    )
+    if categories:
+        stmt = stmt.where(model.category.in_(categories))
+    return stmt
+
+
+async def search_posts(db: AsyncSession, user_id: int, q: str, categories: list[str] | None = None,
+                       limit: int = 20, cursor: str | None = None) -> dict:
+    # Archived posts are searched too, so results are not cut off at
+    # POSTS_RETENTION_DAYS.
+    query = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+    hits = union_all(*(_matches(model, user_id, query, categories) for model in (Post, PostArchive))).subquery()
+    stmt = select(hits)
+    if cursor:
+        last_rank, last_id = parse_cursor(cursor)
+        # ts_rank_cd returns real, so compare at that precision for stable paging.
+        last_rank = cast(last_rank, REAL)
+        stmt = stmt.where(or_(hits.c.rank < last_rank, and_(hits.c.rank == last_rank, hits.c.id < last_id)))
+    result = await db.execute(stmt.order_by(hits.c.rank.desc(), hits.c.id.desc()).limit(limit + 1))
+    rows = result.all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = f"{rows[-1].rank!r}:{rows[-1].id}"
+    return {
+        "results": [
+            {
+                "id": r.id,
+                "profile_id": r.profile_id,
+                "profile_name": r.profile_name,
+                "summary": r.summary,
+                "category": r.category,
+                "post_url": r.post_url,
+                "post_timestamp": r.post_timestamp.isoformat() if r.post_timestamp else None,
+                "created_at": r.created_at.isoformat() if r.created_at else None,
+                "preview": r.preview,
+                "rank": r.rank,
+            }
+            for r in rows
+        ],
+        "next_cursor": next_cursor,
+    }
@@ -1,54 +1,108 @@
+import asyncio
 import os
 import logging
+import threading
+from concurrent.futures import Future
 import httpx
+from app import metrics
 
 logger = logging.getLogger(__name__)
 
-SLACK_WEBHOOK_URL = os.environ.get("SLACK_WEBHOOK_URL", "")
-
-
-async def send_digest(entries: list[dict]) -> bool:
-    if not SLACK_WEBHOOK_URL:
-        logger.warning("SLACK_WEBHOOK_URL is not set. Skipping Slack notification.")
-        return False
-
-    if not entries:
-        logger.info("No entries to send to Slack.")
-        return True
-
-    blocks = [
-        {
-            "type": "header",
-            "text": {
-                "type": "plain_text",
-                "text": "\U0001f4c5 Daily Relationship Update",
-            },
-        },
-        {"type": "divider"},
-    ]
-
-    for entry in entries:
-        text = (
-            f"*Name:* {entry.get('name', 'Unknown')}\n"
-            f"*Category:* {entry.get('category', 'Other')}\n"
-            f"*Summary:* {entry.get('summary', 'N/A')}\n"
-            f"*Suggested Reply:* {entry.get('suggested_reply', 'N/A')}\n"
-            f"*Post Link:* {entry.get('post_url', 'N/A')}"
-        )
-        blocks.append({
-            "type": "section",
-            "text": {"type": "mrkdwn", "text": text},
-        })
-        blocks.append({"type": "divider"})
-
-    payload = {"blocks": blocks}
-
-    try:
-        async with httpx.AsyncClient(timeout=15) as http_client:
-            response = await http_client.post(SLACK_WEBHOOK_URL, json=payload)
-            response.raise_for_status()
-            logger.info(f"Slack digest sent successfully with {len(entries)} entries.")
-            return True
-    except httpx.HTTPError as e:
-        logger.error(f"Failed to send Slack digest: {e}")
-        return False
+SLACK_MAX_BLOCKS = 50
+SLACK_MAX_TEXT = 3000
+SLACK_MAX_CONCURRENCY = int(os.environ.get("SLACK_MAX_CONCURRENCY", "4"))
+SLACK_RATE_LIMIT_RETRIES = 3
+
+
+class SlackWebhookRejected(Exception):
+    # The webhook answered with a 4xx other than 429 (revoked, bad payload);
+    # retrying the same request will not help.
+    pass
+
+
+def _entry_block(entry: dict) -> dict:
+    text = (
+        f"*Name:* {entry.get('name') or 'Unknown'}\n"
+        f"*Category:* {entry.get('category') or 'Other'}\n"
+        f"*Summary:* {entry.get('summary') or 'N/A'}\n"
+        f"*Suggested Reply:* {entry.get('suggested_reply') or 'N/A'}\n"
+        f"*Post Link:* {entry.get('post_url') or 'N/A'}"
+    )
+    if len(text) > SLACK_MAX_TEXT:
+        text = text[:SLACK_MAX_TEXT - 1] + "…"
+    return {"type": "section", "text": {"type": "mrkdwn", "text": text}}
+
+
+def build_digest_payloads(entries: list[dict]) -> list[dict]:
+    # Each message carries a header and divider, then a section and divider
+    # per entry, so large digests are split to stay under SLACK_MAX_BLOCKS.
+    per_message = (SLACK_MAX_BLOCKS - 2) // 2
+    chunks = [entries[i:i + per_message] for i in range(0, len(entries), per_message)]
+    payloads = []
+    for n, chunk in enumerate(chunks, start=1):
+        title = "\U0001f4c5 Daily Relationship Update"
+        if len(chunks) > 1:
+            title += f" ({n}/{len(chunks)})"
+        blocks = [
+            {"type": "header", "text": {"type": "plain_text", "text": title}},
+            {"type": "divider"},
+        ]
+        for entry in chunk:
+            blocks.append(_entry_block(entry))
+            blocks.append({"type": "divider"})
+        payloads.append({"text": title, "blocks": blocks})
+    return payloads
+
+
+class SlackClient:
+    # One AsyncClient on a dedicated event loop thread, shared by every
+    # delivery. Callers on other threads get a concurrent Future back, so
+    # Slack sends run alongside the email pool instead of after it.
+    def __init__(self, max_concurrency: int = SLACK_MAX_CONCURRENCY):
+        self.max_concurrency = max_concurrency
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._client: httpx.AsyncClient | None = None
+        self._semaphore: asyncio.Semaphore | None = None
+        self._lock = threading.Lock()
+
+    def submit(self, webhook_url: str, payload: dict) -> Future:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="slack-client", daemon=True).start()
+        return asyncio.run_coroutine_threadsafe(self._post(webhook_url, payload), self._loop)
+
+    def close(self):
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        if self._client is not None:
+            asyncio.run_coroutine_threadsafe(self._client.aclose(), loop).result(timeout=5)
+            self._client = None
+        loop.call_soon_threadsafe(loop.stop)
+
+    async def _post(self, webhook_url: str, payload: dict):
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=15, limits=httpx.Limits(max_connections=self.max_concurrency),
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with self._semaphore:
+            with metrics.track(metrics.NOTIFY, "slack") as stage:
+                for attempt in range(SLACK_RATE_LIMIT_RETRIES + 1):
+                    response = await self._client.post(webhook_url, json=payload)
+                    if response.status_code != 429 or attempt == SLACK_RATE_LIMIT_RETRIES:
+                        break
+                    delay = min(float(response.headers.get("Retry-After", 2 ** attempt)), 60)
+                    logger.info(f"Slack rate limited; retrying in {delay:.0f}s.")
+                    await asyncio.sleep(delay)
+                if response.status_code == 429:
+                    stage.outcome = "rate_limited"
+                elif 400 <= response.status_code < 500:
+                    stage.outcome = "rejected"
+                    raise SlackWebhookRejected(f"{response.status_code} {response.text[:200]}")
+                response.raise_for_status()
+
+
+slack_client = SlackClient()
@@ -0,0 +1,79 @@
+import os
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Apply pending migrations from the app itself (in the background) instead
+# of requiring `python -m app.migrations` before start. Meant for dev and
+# single-instance deploys.
+MIGRATE_ON_STARTUP = os.environ.get("MIGRATE_ON_STARTUP", "").lower() in ("1", "true", "yes")
+STARTUP_RETRY_SECONDS = 5
+
+STARTING = "starting"
+READY = "ready"
+
+
+class BackgroundStartup:
+    # Brings up the subsystems that need the database (schema check, then
+    # the scheduler) on a daemon thread, so the server starts answering,
+    # /health included, right away. Failed checks are retried until they
+    # pass or the app shuts down; /ready reports where it stands.
+    def __init__(self):
+        self.status = {"database": STARTING, "scheduler": STARTING}
+        self._stop = threading.Event()
+        # Serializes starting the scheduler against stop(), so a shutdown
+        # that lands mid-startup never leaves a scheduler running.
+        self._lock = threading.Lock()
+        self._scheduler_started = False
+        self._thread = None
+
+    @property
+    def ready(self) -> bool:
+        return all(state == READY for state in self.status.values())
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="startup", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._lock:
+            self._stop.set()
+            if self._scheduler_started:
+                from app.scheduler import scheduler
+                scheduler.shutdown(wait=False)
+                self._scheduler_started = False
+
+    def _check_database(self) -> bool:
+        from app.migrations import pending_migrations, migrate
+        try:
+            pending = pending_migrations()
+            if pending and MIGRATE_ON_STARTUP:
+                migrate()
+                pending = []
+        except Exception as e:
+            self.status["database"] = f"unavailable: {e.__class__.__name__}"
+            logger.error(f"Database check failed, retrying in {STARTUP_RETRY_SECONDS}s: {e}")
+            return False
+        if pending:
+            self.status["database"] = f"pending migrations: {', '.join(pending)}"
+            logger.error(
+                f"Database schema is behind ({', '.join(pending)}). "
+                "Run `python -m app.migrations` or set MIGRATE_ON_STARTUP=1."
+            )
+            return False
+        self.status["database"] = READY
+        return True
+
+    def _run(self):
+        while not self._check_database():
+            if self._stop.wait(STARTUP_RETRY_SECONDS):
+                return
+        from app.scheduler import start_scheduler
+        with self._lock:
+            if self._stop.is_set():
+                return
+            start_scheduler()
+            self._scheduler_started = True
+        self.status["scheduler"] = READY
+        logger.info("Background subsystems ready.")
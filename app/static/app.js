@@ -1,11 +1,9 @@
+let profileCache = null;
+const etagCache = new Map();
+
 document.addEventListener('DOMContentLoaded', () => {
-    loadUserInfo();
-    loadProfiles();
-    loadPosts();
-    loadEmailSettings();
-    loadLinkedInSettings();
-    loadNotifications();
-    updateNotifBadge();
+    loadDashboard();
+    connectNotificationStream();
 
     document.querySelectorAll('.tab').forEach(tab => {
         tab.addEventListener('click', () => {
@@ -18,189 +16,265 @@ document.addEventListener('DOMContentLoaded', () => {
     });
 });
 
-async function loadUserInfo() {
+async function loadDashboard() {
     try {
-        const res = await fetch('/api/me');
+        const res = await fetch('/api/bootstrap');
         if (res.status === 401) {
             window.location.href = '/';
             return;
         }
-        const user = await res.json();
-        const greeting = document.getElementById('user-greeting');
-        if (greeting) greeting.textContent = `Hi, ${user.display_name}`;
-    } catch (err) {}
+        const data = await res.json();
+        renderUserInfo(data.me);
+        renderProfiles(data.profiles);
+        renderPosts(data.posts, data.profiles);
+        renderNotifications(data.notifications);
+        renderNotifBadge(data.unread_count);
+        renderEmailSettings(data.email_settings);
+        renderSlackSettings(data.slack_settings);
+        renderLinkedInSettings(data.linkedin_settings);
+    } catch (err) {
+        document.getElementById('profiles-list').innerHTML = '<p class="loading">Failed to load profiles.</p>';
+        document.getElementById('posts-list').innerHTML = '<p class="loading">Failed to load posts.</p>';
+        document.getElementById('notifications-list').innerHTML = '<p class="loading">Failed to load notifications.</p>';
+    }
+}
+
+function renderUserInfo(user) {
+    const greeting = document.getElementById('user-greeting');
+    if (greeting) greeting.textContent = `Hi, ${user.display_name}`;
 }
 
 async function loadProfiles() {
     const container = document.getElementById('profiles-list');
     try {
-        const res = await fetch('/profiles');
-        const profiles = await res.json();
-
-        if (profiles.length === 0) {
-            container.innerHTML = `
-                <div class="empty-state" style="grid-column: 1/-1">
-                    <h3>No profiles yet</h3>
-                    <p>Click "+ Add Profile" to start tracking LinkedIn profiles.</p>
-                </div>`;
-            return;
-        }
-
-        container.innerHTML = profiles.map(p => `
-            <div class="profile-card">
-                <div class="profile-card-header">
-                    <div class="profile-name">${escapeHtml(p.name)}</div>
-                    <span class="profile-type ${p.type}">${p.type}</span>
-                </div>
-                <a href="${escapeHtml(p.linkedin_url)}" target="_blank" class="profile-url">${escapeHtml(p.linkedin_url)}</a>
-                <div class="profile-meta">
-                    <span>Added ${formatDate(p.created_at)}</span>
-                    <button class="btn btn-danger" onclick="deleteProfile(${p.id}, '${escapeHtml(p.name)}')">Delete</button>
-                </div>
-            </div>
-        `).join('');
+        renderProfiles(await fetchJson('/profiles'));
     } catch (err) {
         container.innerHTML = '<p class="loading">Failed to load profiles.</p>';
     }
 }
 
+function renderProfiles(profiles) {
+    const container = document.getElementById('profiles-list');
+    profileCache = profiles;
+
+    if (profiles.length === 0) {
+        container.innerHTML = `
+            <div class="empty-state" style="grid-column: 1/-1">
+                <h3>No profiles yet</h3>
+                <p>Click "+ Add Profile" to start tracking LinkedIn profiles.</p>
+            </div>`;
+        return;
+    }
+
+    container.innerHTML = profiles.map(p => `
+        <div class="profile-card">
+            <div class="profile-card-header">
+                <div class="profile-name">${escapeHtml(p.name)}</div>
+                <span class="profile-type ${p.type}">${p.type}</span>
+            </div>
+            <a href="${escapeHtml(p.linkedin_url)}" target="_blank" class="profile-url">${escapeHtml(p.linkedin_url)}</a>
+            <div class="profile-meta">
+                <span>Added ${formatDate(p.created_at)}</span>
+                <button class="btn btn-danger" onclick="deleteProfile(${p.id}, '${escapeHtml(p.name)}')">Delete</button>
+            </div>
+        </div>
+    `).join('');
+}
+
 async function loadPosts() {
     const container = document.getElementById('posts-list');
     try {
-        const res = await fetch('/posts?limit=50');
-        const posts = await res.json();
-
-        if (posts.length === 0) {
-            container.innerHTML = `
-                <div class="empty-state">
-                    <h3>No posts in the last 24 hours</h3>
-                    <p>Posts will appear here after the daily job runs or you trigger it manually.</p>
-                </div>`;
-            return;
+        const posts = await fetchJson('/posts?limit=50');
+        if (posts.length > 0 && !profileCache) {
+            profileCache = await fetchJson('/profiles');
         }
+        renderPosts(posts, profileCache || []);
+    } catch (err) {
+        container.innerHTML = '<p class="loading">Failed to load posts.</p>';
+    }
+}
+
+function renderPosts(posts, profiles) {
+    const container = document.getElementById('posts-list');
 
-        const profileRes = await fetch('/profiles');
-        const profiles = await profileRes.json();
-        const profileMap = {};
-        profiles.forEach(p => { profileMap[p.id] = p; });
+    if (posts.length === 0) {
+        container.innerHTML = `
+            <div class="empty-state">
+                <h3>No posts in the last 24 hours</h3>
+                <p>Posts will appear here after the daily job runs or you trigger it manually.</p>
+            </div>`;
+        return;
+    }
 
-        const grouped = {};
-        posts.forEach(post => {
-            const dateStr = formatDayGroup(post.post_timestamp || post.created_at);
-            if (!grouped[dateStr]) grouped[dateStr] = [];
-            grouped[dateStr].push(post);
-        });
+    const profileMap = {};
+    profiles.forEach(p => { profileMap[p.id] = p; });
 
-        let html = '';
-        for (const [day, dayPosts] of Object.entries(grouped)) {
-            html += `<div class="day-group">`;
-            html += `<div class="day-header">${escapeHtml(day)}</div>`;
-            html += dayPosts.map(post => {
-                const profile = profileMap[post.profile_id] || {};
-                const profileName = profile.name || 'Unknown';
-                const profileUrl = profile.linkedin_url || '';
-                const categoryClass = (post.category || 'other').toLowerCase().replace(/\s+/g, '-');
-                return `
-                <div class="post-card">
-                    <div class="post-card-header">
-                        <div class="post-author-info">
-                            <span class="post-author-avatar">${profileName.charAt(0).toUpperCase()}</span>
-                            <div>
-                                <span class="post-author">${profileUrl ? `<a href="${escapeHtml(profileUrl)}" target="_blank" class="author-link">${escapeHtml(profileName)}</a>` : escapeHtml(profileName)}</span>
-                                <span class="post-time">${formatTimeAgo(post.post_timestamp || post.created_at)}</span>
-                            </div>
+    const grouped = {};
+    posts.forEach(post => {
+        const dateStr = formatDayGroup(post.post_timestamp || post.created_at);
+        if (!grouped[dateStr]) grouped[dateStr] = [];
+        grouped[dateStr].push(post);
+    });
+
+    let html = '';
+    for (const [day, dayPosts] of Object.entries(grouped)) {
+        html += `<div class="day-group">`;
+        html += `<div class="day-header">${escapeHtml(day)}</div>`;
+        html += dayPosts.map(post => {
+            const profile = profileMap[post.profile_id] || {};
+            const profileName = profile.name || 'Unknown';
+            const profileUrl = profile.linkedin_url || '';
+            const categoryClass = (post.category || 'other').toLowerCase().replace(/\s+/g, '-');
+            return `
+            <div class="post-card">
+                <div class="post-card-header">
+                    <div class="post-author-info">
+                        <span class="post-author-avatar">${profileName.charAt(0).toUpperCase()}</span>
+                        <div>
+                            <span class="post-author">${profileUrl ? `<a href="${escapeHtml(profileUrl)}" target="_blank" class="author-link">${escapeHtml(profileName)}</a>` : escapeHtml(profileName)}</span>
+                            <span class="post-time">${formatTimeAgo(post.post_timestamp || post.created_at)}</span>
                         </div>
-                        <span class="post-category ${categoryClass}">${escapeHtml(post.category || 'Other')}</span>
-                    </div>
-                    <div class="post-summary">${escapeHtml(post.summary || 'No summary')}</div>
-                    <div class="post-text-preview">${escapeHtml(truncate(post.post_text, 200))}</div>
-                    <div class="post-reply">
-                        <div class="post-reply-label">Suggested Reply</div>
-                        ${escapeHtml(post.suggested_reply || 'N/A')}
-                    </div>
-                    <div class="post-footer">
-                        ${post.post_url ? `<a href="${escapeHtml(post.post_url)}" target="_blank" class="view-post-link">View on LinkedIn</a>` : ''}
                     </div>
-                </div>`;
-            }).join('');
-            html += `</div>`;
-        }
+                    <span class="post-category ${categoryClass}">${escapeHtml(post.category || 'Other')}</span>
+                </div>
+                <div class="post-summary">${escapeHtml(post.summary || 'No summary')}</div>
+                <div class="post-text-preview" id="post-text-${post.id}">${escapeHtml(post.post_preview)}${post.post_text_truncated ? `... <a href="#" class="read-more-link" onclick="showFullPost(event, ${post.id})">Read more</a>` : ''}</div>
+                <div class="post-reply" id="post-reply-${post.id}">
+                    <div class="post-reply-label">Suggested Reply</div>
+                    ${post.suggested_reply ? escapeHtml(post.suggested_reply) : `<a href="#" class="read-more-link" onclick="requestReply(event, ${post.id})">Suggest a reply</a>`}
+                </div>
+                <div class="post-footer">
+                    ${post.post_url ? `<a href="${escapeHtml(post.post_url)}" target="_blank" class="view-post-link">View on LinkedIn</a>` : ''}
+                </div>
+            </div>`;
+        }).join('');
+        html += `</div>`;
+    }
 
-        container.innerHTML = html;
+    container.innerHTML = html;
+}
+
+async function showFullPost(event, id) {
+    event.preventDefault();
+    const el = document.getElementById(`post-text-${id}`);
+    try {
+        const post = await fetchJson(`/posts/${id}`);
+        el.textContent = post.post_text;
+        el.classList.add('expanded');
     } catch (err) {
-        container.innerHTML = '<p class="loading">Failed to load posts.</p>';
+        showToast('Failed to load post', 'error');
+    }
+}
+
+async function requestReply(event, id) {
+    event.preventDefault();
+    const link = event.target;
+    link.textContent = 'Writing a reply...';
+    link.removeAttribute('onclick');
+    try {
+        const res = await fetch(`/posts/${id}/reply`, { method: 'POST' });
+        const data = await res.json();
+        if (!res.ok) throw new Error(data.detail || 'Failed to generate reply');
+        const el = document.getElementById(`post-reply-${id}`);
+        el.innerHTML = `<div class="post-reply-label">Suggested Reply</div>${escapeHtml(data.suggested_reply)}`;
+    } catch (err) {
+        showToast(err.message, 'error');
+        link.textContent = 'Suggest a reply';
+        link.setAttribute('onclick', `requestReply(event, ${id})`);
     }
 }
 
 async function loadNotifications() {
     const container = document.getElementById('notifications-list');
     try {
-        const res = await fetch('/notifications?limit=50');
-        const notifs = await res.json();
-
-        if (notifs.length === 0) {
-            container.innerHTML = `
-                <div class="empty-state">
-                    <h3>No notifications yet</h3>
-                    <p>Notifications will appear here after the daily job runs.</p>
-                </div>`;
-            return;
-        }
+        renderNotifications(await fetchJson('/notifications?limit=50'));
+    } catch (err) {
+        container.innerHTML = '<p class="loading">Failed to load notifications.</p>';
+    }
+}
 
-        const grouped = {};
-        notifs.forEach(n => {
-            const dateStr = formatDayGroup(n.created_at);
-            if (!grouped[dateStr]) grouped[dateStr] = [];
-            grouped[dateStr].push(n);
-        });
+function renderNotifications(notifs) {
+    const container = document.getElementById('notifications-list');
 
-        let html = '';
-        for (const [day, dayNotifs] of Object.entries(grouped)) {
-            html += `<div class="day-group">`;
-            html += `<div class="day-header">${escapeHtml(day)}</div>`;
-            html += dayNotifs.map(n => `
-                <div class="notif-card ${n.is_read ? 'read' : 'unread'}">
-                    <div class="notif-header">
-                        <span class="notif-title">${escapeHtml(n.title)}</span>
-                        <span class="notif-time">${formatTimeAgo(n.created_at)}</span>
-                    </div>
-                    <div class="notif-body">${formatNotifBody(n.body)}</div>
-                    ${!n.is_read ? `<button class="btn btn-secondary notif-read-btn" onclick="markRead(${n.id})">Mark Read</button>` : ''}
+    if (notifs.length === 0) {
+        container.innerHTML = `
+            <div class="empty-state">
+                <h3>No notifications yet</h3>
+                <p>Notifications will appear here after the daily job runs.</p>
+            </div>`;
+        return;
+    }
+
+    const grouped = {};
+    notifs.forEach(n => {
+        const dateStr = formatDayGroup(n.created_at);
+        if (!grouped[dateStr]) grouped[dateStr] = [];
+        grouped[dateStr].push(n);
+    });
+
+    let html = '';
+    for (const [day, dayNotifs] of Object.entries(grouped)) {
+        html += `<div class="day-group">`;
+        html += `<div class="day-header">${escapeHtml(day)}</div>`;
+        html += dayNotifs.map(n => `
+            <div class="notif-card ${n.is_read ? 'read' : 'unread'}">
+                <div class="notif-header">
+                    <span class="notif-title">${escapeHtml(n.title)}</span>
+                    <span class="notif-time">${formatTimeAgo(n.created_at)}</span>
                 </div>
-            `).join('');
-            html += `</div>`;
-        }
+                <div class="notif-body">${n.entries && n.entries.length ? renderDigestEntries(n.entries) : formatNotifBody(n.body)}</div>
+                ${!n.is_read ? `<button class="btn btn-secondary notif-read-btn" onclick="markRead(${n.id})">Mark Read</button>` : ''}
+            </div>
+        `).join('');
+        html += `</div>`;
+    }
 
-        container.innerHTML = html;
-    } catch (err) {
-        container.innerHTML = '<p class="loading">Failed to load notifications.</p>';
+    container.innerHTML = html;
+}
+
+function connectNotificationStream() {
+    if (!window.EventSource) {
+        updateNotifBadge();
+        return;
     }
+    const source = new EventSource('/notifications/stream');
+    source.addEventListener('unread-count', e => {
+        renderNotifBadge(JSON.parse(e.data).count);
+    });
+    source.addEventListener('notification', () => {
+        loadNotifications();
+        loadPosts();
+    });
 }
 
 async function updateNotifBadge() {
     try {
         const res = await fetch('/notifications/unread-count');
         const data = await res.json();
-        const badge = document.getElementById('notif-badge');
-        if (data.count > 0) {
-            badge.textContent = data.count;
-            badge.style.display = 'inline-block';
-        } else {
-            badge.style.display = 'none';
-        }
+        renderNotifBadge(data.count);
     } catch (err) {}
 }
 
+function renderNotifBadge(count) {
+    const badge = document.getElementById('notif-badge');
+    if (count > 0) {
+        badge.textContent = count;
+        badge.style.display = 'inline-block';
+    } else {
+        badge.style.display = 'none';
+    }
+}
+
 async function markRead(id) {
     await fetch(`/notifications/mark-read/${id}`, { method: 'POST' });
     loadNotifications();
-    updateNotifBadge();
+    if (!window.EventSource) updateNotifBadge();
 }
 
 async function markAllRead() {
     await fetch('/notifications/mark-all-read', { method: 'POST' });
     loadNotifications();
-    updateNotifBadge();
+    if (!window.EventSource) updateNotifBadge();
     showToast('All notifications marked as read', 'success');
 }
 
@@ -339,7 +413,7 @@ async function triggerJob() {
             status.textContent = data.message;
             loadPosts();
             loadNotifications();
-            updateNotifBadge();
+            if (!window.EventSource) updateNotifBadge();
         } else {
             status.className = 'status-msg error';
             status.textContent = data.detail || 'Job failed';
@@ -369,19 +443,50 @@ async function checkHealth() {
     }
 }
 
-async function loadEmailSettings() {
+function renderEmailSettings(settings) {
+    if (settings.notify_email) document.getElementById('notify_email').value = settings.notify_email;
+    if (settings.smtp_user) document.getElementById('smtp_user').value = settings.smtp_user;
+    if (settings.smtp_host) document.getElementById('smtp_host').value = settings.smtp_host;
+    if (settings.smtp_port) document.getElementById('smtp_port').value = settings.smtp_port;
+    if (settings.smtp_password && settings.smtp_password !== '') {
+        document.getElementById('smtp_password').placeholder = 'Password saved (enter new to change)';
+    }
+}
+
+function renderSlackSettings(settings) {
+    document.getElementById('slack_webhook_url').placeholder = settings.slack_configured
+        ? 'Webhook saved (enter new to change, save empty to turn off)'
+        : 'https://hooks.slack.com/services/...';
+}
+
+async function saveSlackSettings(event) {
+    event.preventDefault();
+    const status = document.getElementById('slack-status');
+    const input = document.getElementById('slack_webhook_url');
+
+    status.className = 'status-msg loading';
+    status.textContent = 'Saving...';
+
     try {
-        const res = await fetch('/settings/email');
-        const settings = await res.json();
-        if (settings.notify_email) document.getElementById('notify_email').value = settings.notify_email;
-        if (settings.smtp_user) document.getElementById('smtp_user').value = settings.smtp_user;
-        if (settings.smtp_host) document.getElementById('smtp_host').value = settings.smtp_host;
-        if (settings.smtp_port) document.getElementById('smtp_port').value = settings.smtp_port;
-        if (settings.smtp_password && settings.smtp_password !== '') {
-            document.getElementById('smtp_password').placeholder = 'Password saved (enter new to change)';
+        const res = await fetch('/settings/slack', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ webhook_url: input.value }),
+        });
+        const data = await res.json();
+        if (res.ok) {
+            status.className = 'status-msg success';
+            status.textContent = data.message;
+            showToast(data.message, 'success');
+            renderSlackSettings({ slack_configured: !!input.value.trim() });
+            input.value = '';
+        } else {
+            status.className = 'status-msg error';
+            status.textContent = data.detail || 'Failed to save';
         }
     } catch (err) {
-        console.log('Could not load email settings');
+        status.className = 'status-msg error';
+        status.textContent = 'Failed to save settings';
     }
 }
 
@@ -423,23 +528,29 @@ async function saveEmailSettings(event) {
     }
 }
 
-async function loadLinkedInSettings() {
-    try {
-        const res = await fetch('/settings/linkedin');
-        const settings = await res.json();
-        const statusEl = document.getElementById('linkedin-status');
-        if (settings.linkedin_configured) {
-            statusEl.className = 'status-msg success';
-            statusEl.textContent = 'RapidAPI key configured - ready to fetch posts';
-        } else {
-            statusEl.className = 'status-msg error';
-            statusEl.textContent = 'RapidAPI key not found. Add RAPIDAPI_KEY to your environment secrets.';
-        }
-    } catch (err) {
-        console.log('Could not load LinkedIn settings');
+function renderLinkedInSettings(settings) {
+    const statusEl = document.getElementById('linkedin-status');
+    if (settings.linkedin_configured) {
+        statusEl.className = 'status-msg success';
+        statusEl.textContent = 'RapidAPI key configured - ready to fetch posts';
+    } else {
+        statusEl.className = 'status-msg error';
+        statusEl.textContent = 'RapidAPI key not found. Add RAPIDAPI_KEY to your environment secrets.';
     }
 }
 
+async function fetchJson(url) {
+    const cached = etagCache.get(url);
+    const res = await fetch(url, {
+        headers: cached ? { 'If-None-Match': cached.etag } : {},
+    });
+    if (res.status === 304 && cached) return cached.data;
+    const data = await res.json();
+    const etag = res.headers.get('ETag');
+    if (res.ok && etag) etagCache.set(url, { etag, data });
+    return data;
+}
+
 function showToast(message, type) {
     const toast = document.getElementById('toast');
     toast.textContent = message;
@@ -495,6 +606,17 @@ function formatTimeAgo(dateStr) {
     return d.toLocaleDateString('en-US', { month: 'short', day: 'numeric' });
 }
 
+function renderDigestEntries(entries) {
+    return entries.map(e => `
+        <div class="notif-entry">
+            <span class="notif-entry-name">${escapeHtml(e.name)}</span>
+            <span class="post-category ${(e.category || 'other').toLowerCase().replace(/\s+/g, '-')}">${escapeHtml(e.category || 'Other')}</span>
+            <div class="notif-entry-summary">${escapeHtml(e.summary || 'N/A')}</div>
+            ${e.post_url ? `<a href="${escapeHtml(e.post_url)}" target="_blank" class="notif-link">View Post</a>` : ''}
+        </div>`).join('');
+}
+
+// Legacy digests stored their entries as joined text.
 function formatNotifBody(body) {
     if (!body) return '';
     return escapeHtml(body).split('\n').map(line => {
@@ -0,0 +1,31 @@
+import threading
+import uuid
+
+# Per-user version stamps for the list endpoints. Writers bump the scopes
+# they touch and readers turn the current stamp into an ETag, so an
+# unchanged list can be answered with 304 before any query runs. Stamps
+# live in process memory; the boot id keeps ETags from an earlier process
+# from ever matching.
+_BOOT_ID = uuid.uuid4().hex[:8]
+_versions: dict[tuple[int, str], int] = {}
+_lock = threading.Lock()
+
+PROFILES = "profiles"
+POSTS = "posts"
+NOTIFICATIONS = "notifications"
+
+
+def bump(user_id: int | None, *scopes: str):
+    if user_id is None:
+        return
+    with _lock:
+        for scope in scopes:
+            key = (user_id, scope)
+            _versions[key] = _versions.get(key, 0) + 1
+
+
+def etag(user_id: int, scope: str, *extra) -> str:
+    with _lock:
+        version = _versions.get((user_id, scope), 0)
+    parts = [scope, str(user_id), _BOOT_ID, str(version), *(str(e) for e in extra)]
+    return f'W/"{"-".join(parts)}"'
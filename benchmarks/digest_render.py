@@ -0,0 +1,91 @@
+"""Digest email rendering cost, string concatenation vs compiled templates.
+
+Runs without a database or SMTP server. The baseline is the previous
+renderer, which built the HTML table with `rows += ...` and rendered the
+plain-text body in a separate pass.
+
+    python -m benchmarks.digest_render [--entries 1000] [--rounds 20]
+"""
+import argparse
+import html
+import time
+
+from app.digest import render_email_digest
+
+
+def _entries(n: int) -> list[dict]:
+    return [
+        {
+            "post_id": i,
+            # Every tenth entry carries markup-significant characters.
+            "name": f"Founder {i} <CEO & Co>" if i % 10 == 0 else f"Founder {i}",
+            "category": ("Funding", "Hiring", "Launch", "Other")[i % 4],
+            "summary": "Announced a Series A led by a top-tier fund to grow the team. " * 3,
+            "suggested_reply": "Congratulations on the raise - exciting times ahead for the whole team!",
+            "post_url": f"https://www.linkedin.com/feed/update/urn:li:activity:{7000000000000000000 + i}/",
+        }
+        for i in range(n)
+    ]
+
+
+def _legacy_render(entries: list[dict], esc=str) -> tuple[str, str]:
+    lines = ["Daily Relationship Update", "=" * 30, ""]
+    for entry in entries:
+        lines.append(f"Name: {entry.get('name', 'Unknown')}")
+        lines.append(f"Category: {entry.get('category', 'Other')}")
+        lines.append(f"Summary: {entry.get('summary', 'N/A')}")
+        lines.append(f"Suggested Reply: {entry.get('suggested_reply', 'N/A')}")
+        lines.append(f"Post Link: {entry.get('post_url', 'N/A')}")
+        lines.append("-" * 30)
+        lines.append("")
+    plain = "\n".join(lines)
+
+    rows = ""
+    for entry in entries:
+        post_url = esc(entry.get("post_url", ""))
+        link_html = f'<a href="{post_url}" style="color:#0a66c2;">View Post</a>' if post_url else "N/A"
+        rows += f"""
+        <tr>
+            <td style="padding:16px; border-bottom:1px solid #eee;">
+                <div style="font-weight:600; font-size:15px; margin-bottom:6px;">{esc(entry.get("name", "Unknown"))}</div>
+                <div style="display:inline-block; background:#616161; color:white; padding:2px 10px; border-radius:12px; font-size:12px; font-weight:600; margin-bottom:8px;">{esc(entry.get("category", "Other"))}</div>
+                <div style="font-size:14px; color:#333; margin-bottom:8px;">{esc(entry.get("summary", "N/A"))}</div>
+                <div style="background:#f8f9fa; border-left:3px solid #0a66c2; padding:8px 12px; font-size:13px; color:#555; margin-bottom:8px;">
+                    <strong style="color:#0a66c2; font-size:11px; text-transform:uppercase;">Suggested Reply</strong><br>{esc(entry.get("suggested_reply", "N/A"))}
+                </div>
+                <div>{link_html}</div>
+            </td>
+        </tr>"""
+    return plain, f"<html><body><table>{rows}</table></body></html>"
+
+
+def _time(fn, rounds: int) -> tuple[float, int]:
+    size = sum(len(part) for part in fn())
+    started = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - started) / rounds * 1e3, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    entries = _entries(args.entries)
+    cases = [
+        ("legacy (+= rows, two passes, unescaped)", lambda: _legacy_render(entries)),
+        ("legacy + html.escape on every field", lambda: _legacy_render(entries, html.escape)),
+        ("compiled templates (one pass, escaped)", lambda: render_email_digest(entries)[1:]),
+    ]
+
+    print(f"{args.entries} entries, {args.rounds} rounds")
+    for name, fn in cases:
+        millis, size = _time(fn, args.rounds)
+        per_1k = millis / args.entries * 1000
+        print(f"  {name:<42} {millis:9.2f} ms/digest {per_1k:9.2f} ms/1k entries {size:>12,} chars")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""Local stand-ins for the upstreams the daily job talks to.
+
+- RapidAPI (the two endpoints `app/linkedin.py` calls) and an
+  OpenAI-compatible `/v1/chat/completions`, served by one uvicorn app.
+- An SMTP sink that speaks EHLO, STARTTLS, AUTH, MAIL/RCPT/DATA.
+
+Every fake has its own latency and error rate (429 for HTTP, 451 for
+SMTP). They run on background threads so a benchmark can point the app
+at them through environment variables and stay fully offline.
+"""
+import asyncio
+import base64
+import json
+import random
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+
+@dataclass
+class UpstreamBehavior:
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    calls: int = 0
+    errors: int = 0
+
+    async def delay(self):
+        self.calls += 1
+        seconds = (self.latency_ms + random.uniform(0, self.jitter_ms)) / 1000
+        if seconds:
+            await asyncio.sleep(seconds)
+
+    def should_fail(self) -> bool:
+        if self.error_rate and random.random() < self.error_rate:
+            self.errors += 1
+            return True
+        return False
+
+
+@dataclass
+class FakeConfig:
+    rapidapi: UpstreamBehavior = field(default_factory=UpstreamBehavior)
+    openai: UpstreamBehavior = field(default_factory=UpstreamBehavior)
+    smtp: UpstreamBehavior = field(default_factory=UpstreamBehavior)
+    posts_per_profile: int = 2
+    messages_received: int = 0
+
+
+CATEGORY_KEYWORDS = (("raised", "Funding"), ("hiring", "Hiring"), ("launched", "Launch"))
+POST_TEMPLATES = (
+    "Thrilled to announce we raised our Series A to keep building for our customers. #{n}",
+    "We're hiring senior engineers across the platform team - come build with us! #{n}",
+    "Today we launched our new analytics product after a year of work. #{n}",
+    "Some reflections on leadership, focus and shipping every week. #{n}",
+)
+
+
+def _http_app(config: FakeConfig) -> Starlette:
+    async def user_profile(request: Request):
+        await config.rapidapi.delay()
+        if config.rapidapi.should_fail():
+            return JSONResponse({"message": "Too many requests"}, status_code=429)
+        username = request.query_params.get("username", "")
+        return JSONResponse({"success": True, "data": {"urn": f"urn-{username}"}})
+
+    async def user_posts(request: Request):
+        await config.rapidapi.delay()
+        if config.rapidapi.should_fail():
+            return JSONResponse({"message": "Too many requests"}, status_code=429)
+        urn = request.query_params.get("urn", "")
+        now_ms = int(time.time() * 1000)
+        data = [
+            {
+                "id": f"{zlib.crc32(urn.encode())}{i:03d}",
+                "text": POST_TEMPLATES[i % len(POST_TEMPLATES)].format(n=f"{urn}-{i}"),
+                "created": now_ms - i * 60_000,
+            }
+            for i in range(config.posts_per_profile)
+        ]
+        return JSONResponse({"success": True, "data": data})
+
+    async def chat_completions(request: Request):
+        await config.openai.delay()
+        if config.openai.should_fail():
+            return JSONResponse(
+                {"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}},
+                status_code=429,
+            )
+        body = await request.json()
+        prompt = body["messages"][-1]["content"]
+        category = next((c for word, c in CATEGORY_KEYWORDS if word in prompt), "Other")
+        content = json.dumps({
+            "summary": "The author shared an update with their network.",
+            "category": category,
+            "suggested_reply": "Congratulations - great news!",
+        })
+        return JSONResponse({
+            "id": "chatcmpl-bench",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "bench"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": 40, "total_tokens": len(prompt) // 4 + 40},
+        })
+
+    return Starlette(routes=[
+        Route("/rapidapi/api/v1/user/profile", user_profile),
+        Route("/rapidapi/api/v1/user/posts", user_posts),
+        Route("/openai/v1/chat/completions", chat_completions, methods=["POST"]),
+    ])
+
+
+def _self_signed_context(directory: Path) -> ssl.SSLContext:
+    cert, key = directory / "cert.pem", directory / "key.pem"
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+         "-subj", "/CN=localhost", "-keyout", str(key), "-out", str(cert)],
+        check=True, capture_output=True,
+    )
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert, key)
+    return context
+
+
+class _SMTPSink:
+    def __init__(self, config: FakeConfig, tls: ssl.SSLContext):
+        self.config = config
+        self.tls = tls
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        async def reply(line: str):
+            writer.write(f"{line}\r\n".encode())
+            await writer.drain()
+
+        await reply("220 localhost bench SMTP sink")
+        try:
+            while True:
+                raw = await reader.readline()
+                if not raw:
+                    break
+                command = raw.decode(errors="replace").strip()
+                verb = command.split(" ", 1)[0].upper()
+                if verb in ("EHLO", "HELO"):
+                    writer.write(b"250-localhost\r\n250-STARTTLS\r\n250-AUTH PLAIN LOGIN\r\n250 8BITMIME\r\n")
+                    await writer.drain()
+                elif verb == "STARTTLS":
+                    await reply("220 Ready to start TLS")
+                    await writer.start_tls(self.tls)
+                elif verb == "AUTH":
+                    if command.upper().startswith("AUTH LOGIN"):
+                        await reply("334 " + base64.b64encode(b"Username:").decode())
+                        await reader.readline()
+                        await reply("334 " + base64.b64encode(b"Password:").decode())
+                        await reader.readline()
+                    await reply("235 Authentication successful")
+                elif verb in ("MAIL", "RCPT", "RSET", "NOOP"):
+                    await reply("250 OK")
+                elif verb == "DATA":
+                    await reply("354 End data with <CR><LF>.<CR><LF>")
+                    while (await reader.readline()) not in (b".\r\n", b".\n", b""):
+                        pass
+                    await self.config.smtp.delay()
+                    if self.config.smtp.should_fail():
+                        await reply("451 4.7.1 Rate limited, try again later")
+                    else:
+                        self.config.messages_received += 1
+                        await reply("250 OK queued")
+                elif verb == "QUIT":
+                    await reply("221 Bye")
+                    break
+                else:
+                    await reply("502 Command not implemented")
+        except (ConnectionError, ssl.SSLError):
+            pass
+        finally:
+            writer.close()
+
+
+class FakeUpstreams:
+    """Starts the fakes on 127.0.0.1 ephemeral ports in a background thread."""
+
+    def __init__(self, config: FakeConfig):
+        self.config = config
+        self.http_port = None
+        self.smtp_port = None
+        self._loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+        self._tmp = tempfile.TemporaryDirectory()
+
+    @property
+    def env(self) -> dict:
+        return {
+            "RAPIDAPI_KEY": "bench",
+            "RAPIDAPI_BASE_URL": f"http://127.0.0.1:{self.http_port}/rapidapi",
+            "RAPIDAPI_REQUEST_DELAY": "0",
+            "AI_INTEGRATIONS_OPENAI_API_KEY": "bench",
+            "AI_INTEGRATIONS_OPENAI_BASE_URL": f"http://127.0.0.1:{self.http_port}/openai/v1",
+        }
+
+    def start(self):
+        threading.Thread(target=self._run, name="bench-fakes", daemon=True).start()
+        if not self._ready.wait(timeout=30):
+            raise RuntimeError("Fake upstreams did not start.")
+        return self
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_until_complete(self._serve())
+
+    async def _serve(self):
+        sink = _SMTPSink(self.config, _self_signed_context(Path(self._tmp.name)))
+        smtp_server = await asyncio.start_server(sink.handle, "127.0.0.1", 0)
+        self.smtp_port = smtp_server.sockets[0].getsockname()[1]
+
+        server = uvicorn.Server(uvicorn.Config(
+            _http_app(self.config), host="127.0.0.1", port=0, log_level="warning", lifespan="off",
+        ))
+        serve = asyncio.create_task(server.serve())
+        while not server.started:
+            await asyncio.sleep(0.01)
+        self.http_port = server.servers[0].sockets[0].getsockname()[1]
+        self._ready.set()
+        await serve
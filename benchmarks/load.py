@@ -0,0 +1,254 @@
+"""HTTP load test of the dashboard API with simulated concurrent users.
+
+Each virtual user enters a name via `/enter`, loads the dashboard and its
+bootstrap payload, then loops until the deadline: polling the unread
+badge, re-listing notifications and profiles with `If-None-Match`, marking
+notifications read, and creating then deleting profiles. Think time
+between actions is randomized. Reports requests/s and p50/p95/p99 per
+route.
+
+Runs against an already-running server. `--seed` first writes load users
+with profiles, posts and unread notifications straight into DATABASE_URL
+(the server's database) so every user starts with realistic data.
+
+    python -m benchmarks.load --base-url http://127.0.0.1:5000 [--users 50]
+        [--duration 60] [--ramp 5] [--think-ms 500] [--seed]
+        [--out after.json] [--compare before.json]
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from collections import defaultdict
+
+import httpx
+
+USER_PREFIX = "Load User"
+
+# Relative weights of the steady-state actions.
+ACTIONS = {
+    "poll_badge": 6,
+    "list_notifications": 2,
+    "mark_read": 1,
+    "mark_all_read": 0.2,
+    "list_posts": 1,
+    "profile_crud": 1,
+}
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    async def request(self, client: httpx.AsyncClient, method: str, url: str, route: str | None = None, **kwargs):
+        route = f"{method} {route or url}"
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.errors[route] += 1
+            self.latencies[route].append(time.perf_counter() - started)
+            return None
+        self.latencies[route].append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            self.errors[route] += 1
+        return response
+
+
+def _percentile(values: list[float], pct: int) -> float:
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[pct - 1]
+
+
+class VirtualUser:
+    def __init__(self, n: int, base_url: str, recorder: Recorder, think: float):
+        self.n = n
+        self.recorder = recorder
+        self.think = think
+        self.client = httpx.AsyncClient(base_url=base_url, timeout=30, follow_redirects=False)
+        self.etags = {}
+        self.unread_ids = []
+        self.created = 0
+
+    async def get(self, url: str, route: str | None = None, conditional: bool = False):
+        headers = {"If-None-Match": self.etags[url]} if conditional and url in self.etags else {}
+        response = await self.recorder.request(self.client, "GET", url, route, headers=headers)
+        if response is not None and conditional and "etag" in response.headers:
+            self.etags[url] = response.headers["etag"]
+        return response
+
+    async def enter(self):
+        await self.recorder.request(self.client, "POST", "/enter", data={"name": f"{USER_PREFIX} {self.n}"})
+        await self.get("/")
+        response = await self.get("/api/bootstrap")
+        if response is not None and response.status_code == 200:
+            self._remember_unread(response.json().get("notifications", []))
+
+    def _remember_unread(self, notifications: list[dict]):
+        self.unread_ids = [n["id"] for n in notifications if not n.get("is_read")]
+
+    async def poll_badge(self):
+        await self.get("/notifications/unread-count")
+
+    async def list_notifications(self):
+        response = await self.get("/notifications", conditional=True)
+        if response is not None and response.status_code == 200:
+            self._remember_unread(response.json())
+
+    async def mark_read(self):
+        if not self.unread_ids:
+            return await self.list_notifications()
+        notif_id = self.unread_ids.pop()
+        await self.recorder.request(
+            self.client, "POST", f"/notifications/mark-read/{notif_id}", "/notifications/mark-read/{id}",
+        )
+
+    async def mark_all_read(self):
+        await self.recorder.request(self.client, "POST", "/notifications/mark-all-read")
+        self.unread_ids = []
+
+    async def list_posts(self):
+        await self.get("/posts", conditional=True)
+
+    async def profile_crud(self):
+        self.created += 1
+        response = await self.recorder.request(self.client, "POST", "/profiles", json={
+            "name": f"Load Profile {self.n}-{self.created}",
+            "linkedin_url": f"https://www.linkedin.com/in/load-{self.n}-{self.created}-{random.getrandbits(32):x}",
+        })
+        await self.get("/profiles", conditional=True)
+        if response is not None and response.status_code == 200:
+            profile_id = response.json()["id"]
+            await self.recorder.request(self.client, "DELETE", f"/profiles/{profile_id}", "/profiles/{id}")
+
+    async def run(self, start_at: float, deadline: float):
+        await asyncio.sleep(max(0.0, start_at - time.monotonic()))
+        names, weights = zip(*ACTIONS.items())
+        try:
+            await self.enter()
+            while time.monotonic() < deadline:
+                await asyncio.sleep(random.uniform(0.5, 1.5) * self.think)
+                await getattr(self, random.choices(names, weights)[0])()
+        finally:
+            await self.client.aclose()
+
+
+def _seed(users: int, profiles: int, posts: int, notifications: int):
+    from datetime import datetime, timedelta
+    from sqlalchemy import insert, select
+    from app.database import SessionLocal
+    from app.models import User, Profile, Post, Notification
+
+    db = SessionLocal()
+    try:
+        now = datetime.utcnow()
+        for n in range(users):
+            username = f"{USER_PREFIX} {n}".lower()
+            user_id = db.scalar(select(User.id).where(User.username == username))
+            if user_id is not None:
+                continue
+            user = User(username=username, display_name=f"{USER_PREFIX} {n}")
+            db.add(user)
+            db.flush()
+            profile_ids = db.scalars(insert(Profile).returning(Profile.id), [
+                {"user_id": user.id, "name": f"Seed Founder {n}-{p}",
+                 "linkedin_url": f"https://www.linkedin.com/in/seed-{n}-{p}", "type": "person"}
+                for p in range(profiles)
+            ]).all()
+            if posts and profile_ids:
+                db.execute(insert(Post), [
+                    {"profile_id": pid, "post_text": "We just closed our Series A to keep building. " * 20,
+                     "post_url": f"https://www.linkedin.com/feed/update/urn:li:activity:{pid}{i:04d}/",
+                     "post_timestamp": now - timedelta(hours=i), "summary": "Company announced its Series A.",
+                     "category": "Funding", "suggested_reply": "Congratulations on the raise!", "created_at": now}
+                    for pid in profile_ids for i in range(posts)
+                ])
+            if notifications:
+                db.execute(insert(Notification), [
+                    {"user_id": user.id, "title": "Daily Update - 3 new post(s)",
+                     "body": "New posts from Seed Founder.", "type": "digest", "is_read": 0,
+                     "created_at": now - timedelta(days=i)}
+                    for i in range(notifications)
+                ])
+        db.commit()
+    finally:
+        db.close()
+
+
+def _summary(recorder: Recorder, elapsed: float) -> dict:
+    routes = {}
+    for route, values in sorted(recorder.latencies.items()):
+        routes[route] = {
+            "requests": len(values),
+            "errors": recorder.errors[route],
+            "rps": len(values) / elapsed,
+            "p50_ms": _percentile(values, 50) * 1e3,
+            "p95_ms": _percentile(values, 95) * 1e3,
+            "p99_ms": _percentile(values, 99) * 1e3,
+            "max_ms": max(values) * 1e3,
+        }
+    return {"elapsed_seconds": elapsed, "routes": routes}
+
+
+def _report(summary: dict, baseline: dict | None):
+    routes = summary["routes"]
+    total = sum(r["requests"] for r in routes.values())
+    errors = sum(r["errors"] for r in routes.values())
+    print(f"{total:,} requests in {summary['elapsed_seconds']:.1f}s "
+          f"({total / summary['elapsed_seconds']:.1f} req/s), {errors:,} errors")
+    print(f"  {'route':<36} {'reqs':>7} {'err':>5} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for route, r in routes.items():
+        line = (f"  {route:<36} {r['requests']:>7,} {r['errors']:>5,} {r['rps']:>8.1f} "
+                f"{r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['max_ms']:>8.1f}")
+        before = (baseline or {}).get("routes", {}).get(route)
+        if before:
+            line += f"  p50 {r['p50_ms'] - before['p50_ms']:+.1f} p99 {r['p99_ms'] - before['p99_ms']:+.1f}"
+        print(line)
+
+
+async def _run(args) -> dict:
+    recorder = Recorder()
+    started = time.monotonic()
+    deadline = started + args.ramp + args.duration
+    users = [VirtualUser(n, args.base_url, recorder, args.think_ms / 1000) for n in range(args.users)]
+    await asyncio.gather(*(
+        user.run(started + args.ramp * n / max(args.users, 1), deadline) for n, user in enumerate(users)
+    ))
+    return _summary(recorder, time.monotonic() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://127.0.0.1:5000")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=60, help="seconds after ramp-up")
+    parser.add_argument("--ramp", type=float, default=5, help="seconds over which users start")
+    parser.add_argument("--think-ms", type=float, default=500)
+    parser.add_argument("--seed", action="store_true", help="seed load users into DATABASE_URL first")
+    parser.add_argument("--seed-profiles", type=int, default=20)
+    parser.add_argument("--seed-posts", type=int, default=5, help="per profile")
+    parser.add_argument("--seed-notifications", type=int, default=30)
+    parser.add_argument("--out", help="write the per-route summary as JSON")
+    parser.add_argument("--compare", help="JSON summary from an earlier run to diff against")
+    args = parser.parse_args()
+
+    if args.seed:
+        _seed(args.users, args.seed_profiles, args.seed_posts, args.seed_notifications)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    summary = asyncio.run(_run(args))
+    _report(summary, baseline)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
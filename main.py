@@ -1,4 +1,7 @@
+import os
 import uvicorn
 
 if __name__ == "__main__":
+    # The dev server applies pending migrations itself, in the background.
+    os.environ.setdefault("MIGRATE_ON_STARTUP", "1")
     uvicorn.run("app.main:app", host="0.0.0.0", port=5000, reload=True)